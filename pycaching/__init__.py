@@ -7,7 +7,7 @@ from pycaching.trackable import Trackable  # NOQA
 from pycaching.geo import Point, Rectangle  # NOQA
 
 
-def login(username=None, password=None):
+def login(username=None, password=None, *, session_file=None):
     """A shortcut for user login.
 
     Create a :class:`.Geocaching` instance and try to login a user. See :meth:`.Geocaching.login`.
@@ -15,5 +15,5 @@ def login(username=None, password=None):
     :return: Created :class:`.Geocaching` instance.
     """
     g = Geocaching()
-    g.login(username, password)
+    g.login(username, password, session_file=session_file)
     return g
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from pycaching.errors import ValueError as PycachingValueError
+from pycaching.geocaching import Geocaching
+
+
+class AsyncGeocaching(object):
+    """Provides an :mod:`asyncio` interface to :class:`.Geocaching`.
+
+    Every blocking operation is dispatched to a pool of worker threads, which share a single
+    :class:`.Geocaching` instance and therefore also its session and connection pool. This way,
+    many requests can be in flight at the same time from a single event loop.
+
+    .. note::
+       Objects returned by this class are ordinary pycaching objects bound to the wrapped
+       :class:`.Geocaching` instance. Accessing their properties which are not yet filled in triggers
+       a blocking lazy loading - use :meth:`load_cache` and :meth:`load_trackable` to load them
+       without blocking the event loop.
+    """
+
+    def __init__(self, geocaching=None, *, max_workers=10):
+        """Create an asynchronous wrapper.
+
+        :param .Geocaching geocaching: Instance to wrap. If :code:`None`, a new one is created.
+        :param int max_workers: Maximum number of requests in flight.
+        """
+        self.geocaching = geocaching or Geocaching()
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pooled_session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Release the worker threads. Requests which are already running are finished first."""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+
+    def _ensure_pool_size(self):
+        """Make the connection pool of current session large enough for all workers.
+
+        Only plain :class:`requests.adapters.HTTPAdapter` is replaced, so custom adapters mounted
+        by the user are kept intact.
+        """
+        session = self.geocaching._session
+        if session is self._pooled_session:
+            return
+        for prefix in ("https://", "http://"):
+            if type(session.get_adapter(prefix)) is requests.adapters.HTTPAdapter:
+                session.mount(prefix, requests.adapters.HTTPAdapter(pool_maxsize=self._max_workers))
+        self._pooled_session = session
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking callable in the worker pool and return its result."""
+        self._ensure_pool_size()
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _iterate(self, iterable):
+        """Turn a blocking iterable into an asynchronous generator.
+
+        Each step of the iteration is run in the worker pool, so the event loop is not blocked
+        while the next page is being loaded.
+        """
+        iterator = iter(iterable)
+        sentinel = object()
+        while True:
+            item = await self._run(next, iterator, sentinel)
+            if item is sentinel:
+                return
+            yield item
+
+    async def login(self, username=None, password=None):
+        """Log in the user. See :meth:`.Geocaching.login`."""
+        await self._run(self.geocaching.login, username, password)
+
+    async def logout(self):
+        """Log out the user. See :meth:`.Geocaching.logout`."""
+        await self._run(self.geocaching.logout)
+
+    async def get_logged_user(self):
+        """Return the name of currently logged user. See :meth:`.Geocaching.get_logged_user`."""
+        return await self._run(self.geocaching.get_logged_user)
+
+    async def geocode(self, location):
+        """Return a :class:`.Point` object from geocoded location. See :meth:`.Geocaching.geocode`."""
+        return await self._run(self.geocaching.geocode, location)
+
+    async def get_cache(self, wp=None, guid=None):
+        """Return a loaded :class:`.Cache` object by its waypoint or GUID.
+
+        Unlike :meth:`.Geocaching.get_cache`, the cache details are loaded immediately.
+
+        :param str wp: Cache waypoint.
+        :param str guid: Cache GUID.
+        :raise .PMOnlyException: If cache is PM only and current user is basic member.
+        :raise .LoadError: If cache loading fails.
+        """
+        cache = await self._run(self.geocaching.get_cache, wp, guid)
+        if wp is not None:
+            await self.load_cache(cache)
+        return cache
+
+    async def load_cache(self, cache, method="load"):
+        """Load details of a :class:`.Cache`.
+
+        :param .Cache cache: Cache to load.
+        :param str method: Name of the loading method to use - either :code:`load`,
+            :code:`load_quick` or :code:`load_by_guid`. See :class:`.Cache` for details.
+        :raise .ValueError: If the loading method is unknown.
+        """
+        if method not in ("load", "load_quick", "load_by_guid"):
+            raise PycachingValueError("Unknown cache loading method '{}'.".format(method))
+        await self._run(getattr(cache, method))
+        return cache
+
+    async def get_trackable(self, tid):
+        """Return a loaded :class:`.Trackable` object by its trackable ID.
+
+        :param str tid: Trackable ID.
+        """
+        trackable = self.geocaching.get_trackable(tid)
+        return await self.load_trackable(trackable)
+
+    async def load_trackable(self, trackable):
+        """Load details of a :class:`.Trackable`.
+
+        :param .Trackable trackable: Trackable to load.
+        """
+        await self._run(trackable.load)
+        return trackable
+
+    async def post_log(self, wp, text, **kwargs):
+        """Post a log for cache. See :meth:`.Geocaching.post_log`."""
+        await self._run(self.geocaching.post_log, wp, text, **kwargs)
+
+    async def search(self, point, limit=float("inf"), **kwargs):
+        """Return an asynchronous generator of caches around some point.
+
+        See :meth:`.Geocaching.search`.
+        """
+        async for cache in self._iterate(self.geocaching.search(point, limit, **kwargs)):
+            yield cache
+
+    async def search_rect(self, rect=None, **kwargs):
+        """Return an asynchronous generator of caches in given Rectange area.
+
+        See :meth:`.Geocaching.search_rect`.
+        """
+        async for cache in self._iterate(self.geocaching.search_rect(rect, **kwargs)):
+            yield cache
+
+    async def sync_rect(self, rect, **kwargs):
+        """Return an asynchronous generator of caches in an area, which changed since they were stored.
+
+        See :meth:`.Geocaching.sync_rect`.
+        """
+        async for cache in self._iterate(self.geocaching.sync_rect(rect, **kwargs)):
+            yield cache
+
+    async def my_logs(self, log_type=None, limit=float("inf")):
+        """Return an asynchronous generator of the logged-in user's logs.
+
+        See :meth:`.Geocaching.my_logs`.
+        """
+        async for cache in self._iterate(self.geocaching.my_logs(log_type, limit)):
+            yield cache
+
+    async def load_logbook(self, cache, limit=float("inf"), **kwargs):
+        """Return an asynchronous generator of logs for a cache.
+
+        See :meth:`.Cache.load_logbook`.
+
+        :param .Cache cache: Cache to load logbook for.
+        """
+        logging.debug("Loading logbook for {} asynchronously".format(cache))
+        async for log in self._iterate(cache.load_logbook(limit, **kwargs)):
+            yield log
+
+    async def load_trackables(self, cache, limit=float("inf")):
+        """Return an asynchronous generator of trackables in a cache.
+
+        See :meth:`.Cache.load_trackables`.
+
+        :param .Cache cache: Cache to load trackables for.
+        """
+        async for trackable in self._iterate(cache.load_trackables(limit)):
+            yield trackable
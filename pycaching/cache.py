@@ -4,13 +4,13 @@ import logging
 import datetime
 import re
 import enum
+import math
 import os
-from bs4.element import Script
 from pycaching import errors
 from pycaching.geo import Point
 from pycaching.trackable import Trackable
 from pycaching.log import Log, Type as LogType
-from pycaching.util import parse_date, rot13, lazy_loaded
+from pycaching.util import parse_date, parse_html, rot13, lazy_loaded, parallel_map, PageRegions, search_source
 
 # prefix _type() function to avoid collisions with cache type
 _type = type
@@ -115,14 +115,84 @@ class Cache(object):
         "log_page": "play/geocache/{wp}/log",
     }
 
+    # parts of the pages used by loaders, the rest is not parsed at all
+    _regions = {
+        "cache_details": PageRegions(
+            ids=["cacheDetails", "ctl00_divContentMain", "ctl00_ContentBody_GeoNav_logTypeImage",
+                 "ctl00_ContentBody_ShortDescription", "ctl00_ContentBody_LongDescription", "div_hint",
+                 "ctl00_ContentBody_Waypoints", "ctl00_ContentBody_lblFindCounts"],
+            classes=["premium-upgrade-widget", "CacheStarLabels", "CacheSize", "Warning",
+                     "CacheDetailNavigationWidget", "OldWarning", "favorite-value"]),
+        "print_page": PageRegions(ids=["Content"], classes=["Warning", "HalfRight"]),
+    }
+
+    # simple fields taken directly from the page sources, see util.search_source()
+    _source_patterns = {
+        "wp": re.compile(r"<title>\s*(GC\w+)"),
+        "location": re.compile(r"<span id=\"uxLatLon\"[^>]*>([^<]+)<"),
+        "logbook_token": re.compile(r"userToken\s*=\s*'([^']+)'"),
+        "original_location": re.compile(r"oldLatLng\":\s*\[([^\]]+)\]"),
+        "print_page_location": re.compile(r"<p class=\"LatLong Meta\">([^<]+)<"),
+    }
+
+    # attributes holding values of the properties, which can be kept in a cache store (see
+    # CacheStore and _loaded_properties()); values of the current user (like found or the logbook
+    # token issued to the session) are left out
+    _property_attributes = {
+        "name": "_name",
+        "location": "_location",
+        "original_location": "_original_location",
+        "waypoints": "_waypoints",
+        "type": "_type",
+        "state": "_state",
+        "size": "_size",
+        "difficulty": "_difficulty",
+        "terrain": "_terrain",
+        "author": "_author",
+        "hidden": "_hidden",
+        "visited": "_visited",
+        "attributes": "_attributes",
+        "summary": "_summary",
+        "description": "_description",
+        "hint": "_hint",
+        "favorites": "_favorites",
+        "log_counts": "_log_counts",
+        "pm_only": "_pm_only",
+        "guid": "_guid",
+        "id": "_id",
+        "last_found": "_last_found",
+        "_trackable_page_url": "_Cache__trackable_page_url",
+    }
+
+    # properties filled in from search_rect() records, see _from_api_record()
+    _api_record_properties = ("name", "type", "state", "found", "size", "difficulty", "terrain", "author", "hidden",
+                              "favorites", "pm_only", "id", "last_found", "did_not_find", "has_log_draft", "location")
+
     @classmethod
-    def _from_print_page(cls, geocaching, guid, soup):
-        """Create a cache instance from a souped print-page and a GUID."""
+    def _from_print_page(cls, geocaching, guid, source):
+        """Create a cache instance from a print-page source and a GUID."""
+        data = geocaching._parse(cls._parse_print_page, source)
+        cache = Cache(geocaching, guid=guid, **data)
+        cache._store(list(data) + ["guid"])
+        return cache
+
+    @staticmethod
+    def _parse_print_page(source, parser):
+        """Return cache properties parsed from a print-page.
+
+        A pure function of the page source, so it can be run in another process.
+
+        :param str source: Page source.
+        :param str parser: BeautifulSoup HTML parser to use.
+        :return: Mapping of cache property names to their values.
+        :rtype: :class:`dict`
+        :raise .PMOnlyException: If the PM only warning is shown on the page.
+        """
+        soup = parse_html(source, parser, parse_only=Cache._regions["print_page"])
         if soup.find("p", "Warning") is not None:
             raise errors.PMOnlyException()
 
         cache_info = dict()
-        cache_info["guid"] = guid
         cache_info["wp"] = soup.find(class_="HalfRight").find("h1").text.strip()
         content = soup.find(id="Content")
         cache_info["name"] = content.find("h2").text.strip()
@@ -155,7 +225,7 @@ class Cache(object):
         cache_info["hint"] = hint.text.strip() if hint else None
         cache_info["waypoints"] = Waypoint.from_html(content, table_id="Waypoints")
         cache_info["log_counts"] = Cache._get_log_counts_from_print_page(soup)
-        return Cache(geocaching, **cache_info)
+        return cache_info
 
     @classmethod
     def _from_api_record(cls, geocaching, record):
@@ -174,17 +244,20 @@ class Cache(object):
             hidden=record['placedDate'].split('T')[0],
             favorites=record['favoritePoints'],
             pm_only=record['premiumOnly'],
+            id=record['id'],
+            did_not_find=record['userDidNotFind'],
+            has_log_draft=record['hasLogDraft'],
 
             # Not consumed attributes:
             # detailsUrl
             # hasGeotour
-            # hasLogDraft
-            # id
-            # lastFoundDate
             # owner.code
-            # userDidNotFind
         )
 
+        # NOTE: never found caches have the date set to 0001-01-01
+        last_found = record['lastFoundDate']
+        cache.last_found = last_found.split('T')[0] if last_found and not last_found.startswith('0001') else None
+
         # NOTE: Basic Members have no access to postedCoordinates of Premium-only caches
         if 'postedCoordinates' in record:
             cache.location = Point(
@@ -192,6 +265,9 @@ class Cache(object):
                 record['postedCoordinates']['longitude']
             )
 
+        store = geocaching._cache_store
+        if store is not None:
+            store.put_search_result(cache, cls._api_record_properties)
         return cache
 
     def __init__(self, geocaching, wp, **kwargs):
@@ -210,7 +286,8 @@ class Cache(object):
         known_kwargs = {"name", "type", "location", "original_location", "state", "found", "size",
                         "difficulty", "terrain", "author", "hidden", "attributes", "summary",
                         "description", "hint", "favorites", "pm_only", "url", "waypoints", "_logbook_token",
-                        "_trackable_page_url", "guid", "visited", "log_counts"}
+                        "_trackable_page_url", "guid", "visited", "log_counts", "id", "last_found",
+                        "did_not_find", "has_log_draft"}
 
         for name in known_kwargs:
             if name in kwargs:
@@ -634,6 +711,65 @@ class Cache(object):
     def pm_only(self, pm_only):
         self._pm_only = bool(pm_only)
 
+    @property
+    def id(self):
+        """The cache numeric identifier used by the search API (filled by
+        :meth:`.Geocaching.search_rect`), or :code:`None` if not known.
+
+        :type: :class:`int`
+        """
+        return getattr(self, "_id", None)
+
+    @id.setter
+    def id(self, id):
+        self._id = int(id)
+
+    @property
+    def last_found(self):
+        """The date of the last found log (filled by :meth:`.Geocaching.search_rect`), or
+        :code:`None` if the cache was never found or the date is not known.
+
+        :setter: Set a date of the last found log. If :class:`str` is passed, then
+            :meth:`.util.parse_date` is used and its return value is stored as a date.
+        :type: :class:`datetime.date`
+        """
+        return getattr(self, "_last_found", None)
+
+    @last_found.setter
+    def last_found(self, last_found):
+        if isinstance(last_found, str):
+            last_found = parse_date(last_found)
+        elif last_found is not None and not isinstance(last_found, datetime.date):
+            raise errors.ValueError(
+                "Passed object is not datetime.date instance nor string containing a date.")
+        self._last_found = last_found
+
+    @property
+    def did_not_find(self):
+        """If the current user logged Didn't find it (filled by :meth:`.Geocaching.search_rect`), or
+        :code:`None` if not known.
+
+        :type: :class:`bool`
+        """
+        return getattr(self, "_did_not_find", None)
+
+    @did_not_find.setter
+    def did_not_find(self, did_not_find):
+        self._did_not_find = bool(did_not_find)
+
+    @property
+    def has_log_draft(self):
+        """If the current user has a log draft for the cache (filled by
+        :meth:`.Geocaching.search_rect`), or :code:`None` if not known.
+
+        :type: :class:`bool`
+        """
+        return getattr(self, "_has_log_draft", None)
+
+    @has_log_draft.setter
+    def has_log_draft(self, has_log_draft):
+        self._has_log_draft = bool(has_log_draft)
+
     @property
     @lazy_loaded
     def _logbook_token(self):
@@ -681,127 +817,195 @@ class Cache(object):
         try:
             # pick url based on what info we have right now
             if hasattr(self, "url"):
-                root = self.geocaching._request(self.url)
+                res = self.geocaching._request(self.url, expect="raw")
             elif hasattr(self, "_wp"):
-                root = self.geocaching._request(self._urls["cache_details"],
-                                                params={"wp": self._wp})
+                res = self.geocaching._request(self._urls["cache_details"],
+                                               params={"wp": self._wp},
+                                               expect="raw")
             else:
                 raise errors.LoadError("Cache lacks info for loading")
         except errors.Error as e:
             # probably 404 during cache loading - cache does not exist
             raise errors.LoadError("Error in loading cache") from e
 
+        data = self.geocaching._parse(self._parse_details_page, res.text)
+        self._update(data)
+        self._store(data)
+        if self.pm_only:
+            raise errors.PMOnlyException()
+
+        logging.debug("Cache loaded: {}".format(self))
+
+    @staticmethod
+    def _parse_details_page(source, parser):
+        """Return cache properties parsed from a cache details page.
+
+        A pure function of the page source, so it can be run in another process.
+
+        :param str source: Page source.
+        :param str parser: BeautifulSoup HTML parser to use.
+        :return: Mapping of cache property names to their values. If the cache is PM only and
+            current user is basic member, only the details shown to basic members are included.
+        :rtype: :class:`dict`
+        """
+        # simple fields are searched in the page source, the rest in the parsed regions of the page
+        root = parse_html(source, parser, parse_only=Cache._regions["cache_details"])
+        data = {}
+
         # check for PM only caches if using free account
-        self.pm_only = root.find("section", "premium-upgrade-widget") is not None
+        data["pm_only"] = root.find("section", "premium-upgrade-widget") is not None
 
-        cache_details = root.find(id="ctl00_divContentMain") if self.pm_only else root.find(id="cacheDetails")
+        cache_details = root.find(id="ctl00_divContentMain") if data["pm_only"] else root.find(id="cacheDetails")
 
         # details also available for basic members for PM only caches -----------------------------
 
-        if self.pm_only:
-            self.wp = cache_details.find("li", "li__gccode").text.strip()
+        if data["pm_only"]:
+            data["wp"] = cache_details.find("li", "li__gccode").text.strip()
 
-            self.name = cache_details.find("h1").text.strip()
+            data["name"] = cache_details.find("h1").text.strip()
 
             author = cache_details.find(id="ctl00_ContentBody_uxCacheBy").text
-            self.author = author[len("A cache by "):]
+            data["author"] = author[len("A cache by "):]
 
             # parse cache detail list into a python list
             details = cache_details.find("ul", "ul__hide-details").text.split("\n")
 
-            self.difficulty = float(details[2])
+            data["difficulty"] = float(details[2])
 
-            self.terrain = float(details[5])
+            data["terrain"] = float(details[5])
 
-            self.size = Size.from_string(details[8])
+            data["size"] = Size.from_string(details[8])
 
-            self.favorites = int(details[11])
+            data["favorites"] = int(details[11])
         else:
             # parse from <title> - get first word
-            try:
-                self.wp = root.title.string.split(" ")[0]
-            except:
-                raise errors.LoadError()
-            self.name = cache_details.find("h2").text
+            wp = search_source(Cache._source_patterns["wp"], source)
+            if not wp:
+                raise errors.LoadError("Cannot find GC code of the cache")
+            data["wp"] = wp
+            data["name"] = cache_details.find("h2").text
 
-            self.author = cache_details("a")[1].text
+            data["author"] = cache_details("a")[1].text
 
             D_and_T_img = root.find("div", "CacheStarLabels").find_all("img")
-            self.difficulty, self.terrain = [float(img.get("alt").split()[0]) for img in D_and_T_img]
+            data["difficulty"], data["terrain"] = [float(img.get("alt").split()[0]) for img in D_and_T_img]
 
             size = root.find("div", "CacheSize")
             size = size.find("img").get("src")  # size img src
             size = size.split("/")[-1].rsplit(".", 1)[0]  # filename w/o extension
-            self.size = Size.from_filename(size)
+            data["size"] = Size.from_filename(size)
 
         # use shared functionality as both cases use the same method
         type = cache_details.select_one("svg.cache-icon use").get("xlink:href")  # "cache-types.svg#icon-3-disabled"
         type = type.split("#")[-1].replace("_", "-").split("-")[1]  # "3"
-        self.type = Type.from_filename(type)
+        data["type"] = Type.from_filename(type)
 
-        if self.pm_only:
-            raise errors.PMOnlyException()
+        if data["pm_only"]:
+            return data
 
         # details not avaliable for basic members for PM only caches ------------------------------
         pm_only_warning = root.find("p", "Warning NoBottomSpacing")
-        self.pm_only = pm_only_warning and ("Premium Member Only" in pm_only_warning.text) or False
+        data["pm_only"] = pm_only_warning and ("Premium Member Only" in pm_only_warning.text) or False
 
         attributes_widget, inventory_widget, *_ = root.find_all("div", "CacheDetailNavigationWidget")
 
         hidden = cache_details.find("div", "minorCacheDetails").find_all("div")[1].text
-        self.hidden = parse_date(hidden.split(":")[-1])
+        data["hidden"] = parse_date(hidden.split(":")[-1])
 
-        self.location = Point.from_string(root.find(id="uxLatLon").text)
+        location = search_source(Cache._source_patterns["location"], source)
+        if not location:
+            raise errors.LoadError("Cannot find location of the cache")
+        data["location"] = location
 
-        self.state = root.find("ul", "OldWarning") is None
+        data["state"] = root.find("ul", "OldWarning") is None
 
         log_image = root.find(id="ctl00_ContentBody_GeoNav_logTypeImage")
         if log_image:
             log_image_filename = log_image.get("src").split("/")[-1].rsplit(".", 1)[0]  # filename w/o extension
-            self._found_status = Log(type=LogType.from_filename(log_image_filename))
+            data["_found_status"] = Log(type=LogType.from_filename(log_image_filename))
         else:
-            self._found_status = None
+            data["_found_status"] = None
 
         attributes_raw = attributes_widget.find_all("img")
         attributes_raw = [_.get("src").split("/")[-1].rsplit("-", 1) for _ in attributes_raw]
 
-        self.attributes = {attribute_name: appendix.startswith("yes") for attribute_name, appendix
-                           in attributes_raw if not appendix.startswith("blank")}
+        data["attributes"] = {attribute_name: appendix.startswith("yes") for attribute_name, appendix
+                              in attributes_raw if not appendix.startswith("blank")}
 
-        self.summary = root.find(id="ctl00_ContentBody_ShortDescription").text
-        self.description = root.find(id="ctl00_ContentBody_LongDescription").text
+        data["summary"] = root.find(id="ctl00_ContentBody_ShortDescription").text
+        data["description"] = root.find(id="ctl00_ContentBody_LongDescription").text
 
-        self.hint = rot13(root.find(id="div_hint").text.strip())
+        data["hint"] = rot13(root.find(id="div_hint").text.strip())
 
         favorites = root.find("span", "favorite-value")
         if favorites:
-            self.favorites = int(favorites.text)
+            data["favorites"] = int(favorites.text)
         else:
-            self.favorites = 0
+            data["favorites"] = 0
+
+        logbook_token = search_source(Cache._source_patterns["logbook_token"], source)
+        if not logbook_token:
+            raise errors.LoadError("Cannot find logbook token of the cache")
+        data["_logbook_token"] = logbook_token
 
-        js_content = "\n".join(root.find_all(string=lambda i: isinstance(i, Script)))
-        self._logbook_token = re.findall("userToken\\s*=\\s*'([^']+)'", js_content)[0]
         # find original location if any
-        if "oldLatLng\":" in js_content:
-            old_lat_long = js_content.split("oldLatLng\":")[1].split(']')[0].split('[')[1]
-            self.original_location = Point(old_lat_long)
-        else:
-            self.original_location = None
+        old_lat_long = search_source(Cache._source_patterns["original_location"], source)
+        data["original_location"] = Point(old_lat_long) if old_lat_long else None
 
         # if there are some trackables
         if len(inventory_widget.find_all("a")) >= 3:
             trackable_page_url = inventory_widget.find(id="ctl00_ContentBody_uxTravelBugList_uxViewAllTrackableItems")
-            self._trackable_page_url = trackable_page_url.get("href")[3:]  # has "../" on start
+            data["_trackable_page_url"] = trackable_page_url.get("href")[3:]  # has "../" on start
         else:
-            self._trackable_page_url = None
+            data["_trackable_page_url"] = None
 
         # Additional Waypoints
-        self.waypoints = Waypoint.from_html(root, "ctl00_ContentBody_Waypoints")
+        data["waypoints"] = Waypoint.from_html(root, "ctl00_ContentBody_Waypoints")
 
         # Log counts
-        self.log_counts = Cache._get_log_counts_from_cache_details(root)
+        data["log_counts"] = Cache._get_log_counts_from_cache_details(root)
 
-        logging.debug("Cache loaded: {}".format(self))
+        return data
+
+    def _update(self, data):
+        """Fill in cache properties from data returned by a page parser.
+
+        :param dict data: Mapping of property names to their values.
+        """
+        for name, value in data.items():
+            setattr(self, name, value)
+
+    def _loaded_properties(self, names=None):
+        """Return values of loaded properties, without triggering lazy loading.
+
+        :param names: Names of the properties, see :attr:`_property_attributes`. If :code:`None`,
+            all of them are returned.
+        :return: Mapping of names of the properties filled in to their values.
+        :rtype: :class:`dict`
+        """
+        names = self._property_attributes.keys() if names is None else names
+        return {name: getattr(self, self._property_attributes[name]) for name in names
+                if name in self._property_attributes and hasattr(self, self._property_attributes[name])}
+
+    def _store(self, names):
+        """Write loaded properties through to the cache store, if :class:`.Geocaching` has one.
+
+        :param names: Names of the loaded properties.
+        """
+        store = self.geocaching._cache_store
+        if store is not None:
+            store.put(self, names)
+
+    def _load_stored(self):
+        """Fill in properties from the cache store, if :class:`.Geocaching` has one.
+
+        Used by lazy loading before the cache is loaded from geocaching.com.
+
+        :return: Whether any property was filled in.
+        :rtype: :class:`bool`
+        """
+        store = self.geocaching._cache_store
+        return store is not None and hasattr(self, "_wp") and store.fill(self)
 
     def load_quick(self):
         """Load basic cache details.
@@ -834,6 +1038,8 @@ class Cache(object):
         self.favorites = int(data["fp"])
         self.pm_only = data["subrOnly"]
         self.guid = res["data"][0]["g"]
+        self._store(["name", "type", "state", "size", "difficulty", "terrain", "hidden", "author", "favorites",
+                     "pm_only", "guid"])
 
         logging.debug("Cache loaded: {}".format(self))
 
@@ -854,16 +1060,20 @@ class Cache(object):
         if not self.guid:
             self.load_quick()
 
-        res = self.geocaching._request(self._urls["print_page"],
-                                       params={"guid": self.guid})
+        source = self.geocaching._request(self._urls["print_page"],
+                                          params={"guid": self.guid},
+                                          expect="raw").text
+        res = self.geocaching._parse_html(source, self._regions["print_page"])
         if res.find("p", "Warning") is not None:
             raise errors.PMOnlyException()
         content = res.find(id="Content")
 
         self.name = content.find("h2").text
 
-        self.location = Point.from_string(
-            content.find("p", "LatLong Meta").text)
+        location = search_source(self._source_patterns["print_page_location"], source)
+        if not location:
+            raise errors.LoadError("Cannot find location of the cache")
+        self.location = location
 
         type_img = os.path.basename(content.find("img").get("src"))
         self.type = Type.from_filename(os.path.splitext(type_img)[0])
@@ -879,7 +1089,7 @@ class Cache(object):
         # TODO do NOT use English phrases like "Placed by" to search for attributes
 
         self.author = content.find(
-            "p", text=re.compile("Placed by:")).text.split("\r\n")[2].strip()
+            "p", text=re.compile("Placed by:")).text.split("Placed by:")[1].strip()
 
         hidden_p = content.find("p", text=re.compile("Placed Date:"))
         self.hidden = hidden_p.text.replace("Placed Date:", "").strip()
@@ -908,6 +1118,9 @@ class Cache(object):
 
         self.log_counts = Cache._get_log_counts_from_print_page(res)
 
+        self._store(["name", "location", "type", "size", "difficulty", "terrain", "author", "hidden", "attributes",
+                     "summary", "description", "hint", "favorites", "waypoints", "log_counts", "guid"])
+
     @staticmethod
     def _get_log_counts_from_cache_details(soup):
         """Return a dictionary of all log counts found in the page
@@ -1015,43 +1228,70 @@ class Cache(object):
 
         return res["data"]
 
-    def load_logbook(self, limit=float("inf")):
+    def _logbook_pages(self, per_page, limit, concurrency):
+        """Return a generator of logbook pages.
+
+        The pages estimated from :attr:`log_counts` are loaded by :code:`concurrency` threads, the
+        rest of them one by one. Closing the generator cancels the pages not loaded yet.
+        """
+        page = 0
+        if concurrency > 1 and per_page > 0:
+            self._logbook_token  # lazy load the cache once, not in every thread
+            estimated = math.ceil(min(limit, sum(self.log_counts.values())) / per_page)
+            logging.debug("Loading {} logbook pages, {} at once".format(estimated, concurrency))
+            pages = parallel_map(lambda p: self._logbook_get_page(p, per_page), range(estimated),
+                                 workers=concurrency)
+            try:
+                for logbook_page in pages:
+                    yield logbook_page
+                    page += 1
+            finally:
+                pages.close()
+
+        while True:
+            yield self._logbook_get_page(page, per_page)
+            page += 1
+
+    def load_logbook(self, limit=float("inf"), *, concurrency=1):
         """Return a generator of logs for this cache.
 
         Yield instances of :class:`.Log` filled with log data.
 
         :param int limit: Maximum number of logs to generate.
+        :param int concurrency: Maximum number of logbook pages loaded at the same time. The number
+            of pages is estimated from :attr:`log_counts`, pages over the estimate are loaded one by
+            one. Logs are generated in the logbook order anyway. When the limit is reached or the
+            generator is closed, pages not loaded yet are cancelled.
         """
         logging.info("Loading logbook for {}...".format(self))
 
-        page = 0
         per_page = min(limit, 100)  # max number to fetch in one request is 100 items
+        pages = self._logbook_pages(per_page, limit, concurrency)
 
-        while True:
-            # get one page
-            logbook_page = self._logbook_get_page(page, per_page)
-            page += 1
-
-            if not logbook_page:
-                # result is empty - no more logs
-                return
+        try:
+            for logbook_page in pages:
+                if not logbook_page:
+                    # result is empty - no more logs
+                    return
 
-            for log_data in logbook_page:
+                for log_data in logbook_page:
 
-                limit -= 1  # handle limit
-                if limit < 0:
-                    return
+                    limit -= 1  # handle limit
+                    if limit < 0:
+                        return
 
-                img_filename = log_data["LogTypeImage"].rsplit(".", 1)[0]  # filename w/o extension
+                    img_filename = log_data["LogTypeImage"].rsplit(".", 1)[0]  # filename w/o extension
 
-                # create and fill log object
-                yield Log(
-                    uuid=log_data['LogGuid'],
-                    type=LogType.from_filename(img_filename),
-                    text=log_data["LogText"],
-                    visited=log_data["Visited"],
-                    author=log_data["UserName"]
-                )
+                    # create and fill log object
+                    yield Log(
+                        uuid=log_data['LogGuid'],
+                        type=LogType.from_filename(img_filename),
+                        text=log_data["LogText"],
+                        visited=log_data["Visited"],
+                        author=log_data["UserName"]
+                    )
+        finally:
+            pages.close()
 
     # TODO: trackable list can have multiple pages - handle it in similar way as _logbook_get_page
     # for example see: http://www.geocaching.com/geocache/GC26737_geocaching-jinak-tb-gc-hrbitov
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pycaching.cache import Type, Size, Waypoint
+from pycaching.geo import Point
+from pycaching.log import Type as LogType
+from pycaching.util import parse_date
+
+
+def _encode_point(point):
+    return [point.latitude, point.longitude] if point is not None else None
+
+
+def _decode_point(value):
+    return Point(*value) if value is not None else None
+
+
+def _encode_date(date):
+    return date.isoformat() if date is not None else None
+
+
+def _decode_date(value):
+    return parse_date(value) if value is not None else None
+
+
+def _encode_waypoints(waypoints):
+    return {id: [wpt.type, _encode_point(wpt.location), wpt.note] for id, wpt in waypoints.items()}
+
+
+def _decode_waypoints(value):
+    return {id: Waypoint(id, type, _decode_point(location), note) for id, (type, location, note) in value.items()}
+
+
+RefreshPlan = namedtuple("RefreshPlan", "details logbook")
+"""Caches to reload, returned by :meth:`.CacheStore.plan_refresh`.
+
+Contains a list of caches to load by :meth:`.Cache.load` (:code:`details`) and a list of caches
+to load by :meth:`.Cache.load_logbook` (:code:`logbook`). A cache can be in both of them.
+"""
+
+
+class CacheStore(object):
+    """Persistent on-disk store of :class:`.Cache` properties, stored in a SQLite database.
+
+    Properties of caches are written through whenever a cache is loaded or found by a search. Each
+    property is stored with its own timestamp, so properties loaded by different methods (e.g.
+    by :meth:`.Cache.load_quick` and later by :meth:`.Cache.load`) age independently. The store
+    also remembers when each property last changed its value, see :meth:`changed_since`. When
+    a property of a cache is accessed and it is not filled in yet, the fresh stored properties are
+    used before loading the cache from geocaching.com.
+
+    Properties of the logged in user (like :attr:`.Cache.found`) are not stored, so that the store
+    can be shared by more accounts.
+
+    Pass an instance to :class:`.Geocaching` to enable the store.
+    """
+
+    # {property name: (encoder to JSON, decoder from JSON)}, for the names see Cache._property_attributes
+    _fields = {
+        "name": (None, None),
+        "location": (_encode_point, _decode_point),
+        "original_location": (_encode_point, _decode_point),
+        "waypoints": (_encode_waypoints, _decode_waypoints),
+        "type": (lambda type: type.value, Type),
+        "state": (None, None),
+        "size": (lambda size: size.value, Size),
+        "difficulty": (None, None),
+        "terrain": (None, None),
+        "author": (None, None),
+        "hidden": (_encode_date, _decode_date),
+        "visited": (_encode_date, _decode_date),
+        "attributes": (None, None),
+        "summary": (None, None),
+        "description": (None, None),
+        "hint": (None, None),
+        "favorites": (None, None),
+        "log_counts": (lambda counts: {type.value: count for type, count in counts.items()},
+                       lambda value: {LogType(type): count for type, count in value.items()}),
+        "pm_only": (None, None),
+        "guid": (None, None),
+        "id": (None, None),
+        "last_found": (_encode_date, _decode_date),
+        "_trackable_page_url": (None, None),
+    }
+
+    # properties filled in by search_rect(), which signal that the cache details or logbook changed
+    _refresh_signals = {
+        "details": {"name", "location", "type", "state", "size", "difficulty", "terrain", "favorites", "pm_only"},
+        "logbook": {"last_found"},
+    }
+
+    # prefix of names under which the values from search results are stored, see put_search_result()
+    _search_prefix = "search:"
+
+    # INSERT ... ON CONFLICT DO UPDATE is supported since SQLite 3.24
+    _upsert = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+    def __init__(self, filename, *, max_age=24 * 60 * 60):
+        """Open (or create) a cache store.
+
+        :param str filename: Path to the database file.
+        :param float max_age: Number of seconds a stored property is considered fresh. Use
+            :code:`None` to use the stored properties regardless of their age.
+        """
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS properties (
+                    wp TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    value TEXT,
+                    updated REAL NOT NULL,
+                    changed REAL NOT NULL,
+                    PRIMARY KEY (wp, name)
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS properties_guid ON properties (value) WHERE name = 'guid'")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS sync_order (
+                    area TEXT NOT NULL,
+                    wp TEXT NOT NULL,
+                    successor TEXT,
+                    PRIMARY KEY (area, wp)
+                )""")
+
+    def close(self):
+        """Close the underlying database."""
+        with self._lock:
+            self._db.close()
+
+    def put(self, cache, names=None):
+        """Store properties of a cache.
+
+        :param .Cache cache: Cache to store.
+        :param names: Names of the properties to store (e.g. those just loaded). Properties which
+            are not stored (like :code:`wp`) are ignored. If :code:`None`, all filled in properties
+            are stored.
+        """
+        self._put_rows(self._rows(cache, names))
+
+    def put_search_result(self, cache, names):
+        """Store properties of a cache found by a search.
+
+        The properties are stored as by :meth:`put`, and their values are also kept apart as
+        signals of changes, see :meth:`changed_in_search`. Loading the cache page stores some of
+        them in another form (e.g. the author as shown on the page, or the location rounded to
+        thousandths of minutes), so only the search results can be compared with each other.
+
+        :param .Cache cache: Cache to store.
+        :param names: Names of the properties filled in from the search result.
+        """
+        self._put_rows(self._rows(cache, names) + self._rows(cache, names, prefix=self._search_prefix))
+
+    def _rows(self, cache, names, prefix=""):
+        """Return rows of the properties table with encoded property values."""
+        names = self._fields.keys() if names is None else self._fields.keys() & set(names)
+        now = time.time()
+        rows = []
+        for name, value in cache._loaded_properties(names).items():
+            encode = self._fields[name][0]
+            rows.append((cache._wp, prefix + name, json.dumps(encode(value) if encode else value), now, now))
+        return rows
+
+    def _put_rows(self, rows):
+        """Insert or update rows of the properties table, keeping the time of change of equal values."""
+        if not rows:
+            return
+        with self._lock, self._db:
+            if self._upsert:
+                self._db.executemany("""
+                    INSERT INTO properties VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (wp, name) DO UPDATE SET
+                        changed = CASE WHEN value IS excluded.value THEN changed ELSE excluded.changed END,
+                        value = excluded.value,
+                        updated = excluded.updated""", rows)
+                return
+            for i, (wp, name, value, updated, changed) in enumerate(rows):
+                row = self._db.execute("SELECT value, changed FROM properties WHERE wp = ? AND name = ?",
+                                       (wp, name)).fetchone()
+                if row is not None and row[0] == value:
+                    rows[i] = wp, name, value, updated, row[1]
+            self._db.executemany("INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?, ?)", rows)
+
+    def get(self, wp, *, max_age=None):
+        """Return fresh stored properties of a cache.
+
+        :param str wp: Cache waypoint.
+        :param float max_age: Maximal age of the properties in seconds, :attr:`max_age` if
+            :code:`None`.
+        :return: Mapping of property names to pairs of (value, time of storing as UNIX timestamp).
+        :rtype: :class:`dict`
+        """
+        max_age = self.max_age if max_age is None else max_age
+        oldest = time.time() - max_age if max_age is not None else 0
+        with self._lock:
+            rows = self._db.execute("SELECT name, value, updated FROM properties WHERE wp = ? AND updated >= ?",
+                                    (wp, oldest)).fetchall()
+        result = {}
+        for name, value, updated in rows:
+            if name not in self._fields:
+                continue
+            decode = self._fields[name][1]
+            value = json.loads(value)
+            result[name] = (decode(value) if decode and value is not None else value), updated
+        return result
+
+    def changed_since(self, wp, timestamp, names=None):
+        """Return names of cache properties, whose stored value changed since given time.
+
+        Properties stored for the first time count as changed, storing the same value again does
+        not.
+
+        :param str wp: Cache waypoint.
+        :param float timestamp: UNIX timestamp.
+        :param names: Names of the properties to check. If :code:`None`, all are checked.
+        :rtype: :class:`set`
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT name FROM properties WHERE wp = ? AND changed >= ?",
+                                    (wp, timestamp)).fetchall()
+        changed = {name for name, in rows}
+        return changed if names is None else changed & set(names)
+
+    def changed_in_search(self, wp, timestamp, names=None):
+        """Return names of cache properties, whose value in search results changed since given time.
+
+        Like :meth:`changed_since`, but only the values stored by :meth:`put_search_result` are
+        compared.
+
+        :param str wp: Cache waypoint.
+        :param float timestamp: UNIX timestamp.
+        :param names: Names of the properties to check. If :code:`None`, all are checked.
+        :rtype: :class:`set`
+        """
+        prefix = self._search_prefix
+        changed = {name[len(prefix):] for name in self.changed_since(wp, timestamp) if name.startswith(prefix)}
+        return changed if names is None else changed & set(names)
+
+    def replace_successor(self, area, wp, successor):
+        """Store which cache followed another one in the results of a sync.
+
+        Used by :meth:`.Geocaching.sync_rect` to notice caches, which moved in the results ordered
+        by their last visit, even if none of their properties changed.
+
+        :param str area: Identifier of the synced area and order.
+        :param str wp: Cache waypoint.
+        :param str successor: Waypoint of the following cache, :code:`None` for the last one.
+        :return: Previously stored successor, :code:`None` if there was none.
+        """
+        with self._lock, self._db:
+            row = self._db.execute("SELECT successor FROM sync_order WHERE area = ? AND wp = ?",
+                                   (area, wp)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO sync_order VALUES (?, ?, ?)", (area, wp, successor))
+        return row[0] if row else None
+
+    def plan_refresh(self, caches, since):
+        """Return which caches need reloading, because their search results changed.
+
+        Compare cheap signals of changes written through by a search (like the last found date,
+        favorite points or status, see :meth:`.Geocaching.search_rect`) with the values stored
+        by the previous searches, see :meth:`changed_in_search`. Caches with changed details and
+        new caches are planned for :meth:`.Cache.load`, caches with a new found date for
+        :meth:`.Cache.load_logbook`.
+
+        :param caches: Iterable of :class:`.Cache` objects returned by the search.
+        :param float since: UNIX timestamp of the search start.
+        :rtype: :class:`.RefreshPlan`
+        """
+        details, logbook = self._refresh_signals["details"], self._refresh_signals["logbook"]
+        plan = RefreshPlan([], [])
+        for cache in caches:
+            changed = self.changed_in_search(cache.wp, since, details | logbook | {"id"})
+            if "id" in changed:  # not stored by any search before
+                plan.details.append(cache)
+                continue
+            if changed & details:
+                plan.details.append(cache)
+            if changed & logbook:
+                plan.logbook.append(cache)
+        logging.debug("Planned {} caches for loading details and {} for loading logbook".format(
+            len(plan.details), len(plan.logbook)))
+        return plan
+
+    def fill(self, cache):
+        """Fill in fresh stored properties of a cache, which are not filled in yet.
+
+        :param .Cache cache: Cache to fill.
+        :return: Whether any property was filled in.
+        :rtype: :class:`bool`
+        """
+        stored = self.get(cache._wp)
+        loaded = cache._loaded_properties(stored)
+        filled = 0
+        for name, (value, _) in stored.items():
+            if name not in loaded:
+                setattr(cache, name, value)  # through the property setters
+                filled += 1
+        if filled:
+            logging.debug("Filled {} stored properties into {}".format(filled, cache))
+        return filled > 0
+
+    def find_wp(self, guid):
+        """Return a waypoint of a stored cache by its GUID.
+
+        :param str guid: Cache GUID.
+        :return: Cache waypoint or :code:`None` if not found.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT wp FROM properties WHERE name = 'guid' AND value = ?",
+                                   (json.dumps(guid),)).fetchone()
+        return row[0] if row else None
+
+    def remove(self, wp):
+        """Remove all stored properties of a cache.
+
+        :param str wp: Cache waypoint.
+        """
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM properties WHERE wp = ?", (wp,))
+            self._db.execute("DELETE FROM sync_order WHERE wp = ?", (wp,))
+
+    def clear(self):
+        """Remove all stored caches."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM properties")
+            self._db.execute("DELETE FROM sync_order")
+
+    def __len__(self):
+        """Return the number of stored caches."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(DISTINCT wp) FROM properties").fetchone()[0]
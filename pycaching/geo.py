@@ -3,7 +3,7 @@
 import math
 import re
 import logging
-import weakref
+import threading
 import itertools
 import geopy
 import geopy.distance
@@ -11,7 +11,12 @@ import geopy.format
 from statistics import mean
 from collections import namedtuple
 from pycaching.errors import ValueError as PycachingValueError, GeocodeError, BadBlockError, Error
-from pycaching.util import lazy_loaded
+from pycaching.util import lazy_loaded, deprecated
+
+try:
+    from geographiclib.geodesic import Geodesic
+except ImportError:  # geographiclib is installed with geopy >= 1.13 only
+    Geodesic = None
 
 
 def to_decimal(deg, min):
@@ -19,6 +24,82 @@ def to_decimal(deg, min):
     return round(deg + min / 60, 5)
 
 
+def distances(origin, points, *, ellipsoidal=False):
+    """Return distances in meters from the origin to each of the points.
+
+    Much faster than computing :code:`geopy.distance.distance` for each pair separately.
+
+    :param origin: :class:`.Point` to measure from, or a sequence of points of the same length as
+        :code:`points` to measure pairwise distances.
+    :param points: Sequence of :class:`.Point` instances, e.g. locations of caches.
+    :param bool ellipsoidal: Whether to compute on WGS-84 ellipsoid. It is slower, but accurate
+        to millimeters, while the default spherical (haversine) formula has error up to 0.5 %.
+    :rtype: :class:`list` of :class:`float`
+    :raise .ValueError: If the sequences for pairwise distances have different lengths.
+    """
+    if ellipsoidal:
+        return [inverse["s12"] for inverse in _geodesic_inverse(origin, points, "DISTANCE")]
+
+    radius = geopy.distance.EARTH_RADIUS * 1000
+    results = []
+    for (lat1, lon1, cos1), (lat2, lon2, cos2) in _radian_pairs(origin, points):
+        h = math.sin((lat2 - lat1) / 2) ** 2 + cos1 * cos2 * math.sin((lon2 - lon1) / 2) ** 2
+        results.append(2 * radius * math.asin(math.sqrt(min(1, h))))
+    return results
+
+
+def bearings(origin, points, *, ellipsoidal=False):
+    """Return initial bearings in degrees (0 to 360, clockwise from north) from the origin to each of the points.
+
+    For the parameters, see :func:`distances`.
+
+    :rtype: :class:`list` of :class:`float`
+    :raise .ValueError: If the sequences for pairwise bearings have different lengths.
+    """
+    if ellipsoidal:
+        return [inverse["azi1"] % 360 for inverse in _geodesic_inverse(origin, points, "AZIMUTH")]
+
+    results = []
+    for (lat1, lon1, cos1), (lat2, lon2, cos2) in _radian_pairs(origin, points):
+        x = math.sin(lon2 - lon1) * cos2
+        y = cos1 * math.sin(lat2) - math.sin(lat1) * cos2 * math.cos(lon2 - lon1)
+        results.append(math.degrees(math.atan2(x, y)) % 360)
+    return results
+
+
+def _point_pairs(origin, points):
+    """Return pairs of points to compute with, see :func:`distances`."""
+    points = list(points)
+    if isinstance(origin, geopy.Point):
+        return zip(itertools.repeat(origin), points)
+    origins = list(origin)
+    if len(origins) != len(points):
+        raise PycachingValueError("Pairwise computation needs the same number of points on both sides.")
+    return zip(origins, points)
+
+
+def _radian_pairs(origin, points):
+    """Return pairs of (latitude, longitude, latitude cosine) in radians, see :func:`distances`."""
+    def radians(p):
+        lat = math.radians(p.latitude)
+        return lat, math.radians(p.longitude), math.cos(lat)
+
+    if isinstance(origin, geopy.Point):
+        # convert the origin only once
+        return zip(itertools.repeat(radians(origin)), map(radians, points))
+    return ((radians(a), radians(b)) for a, b in _point_pairs(origin, points))
+
+
+def _geodesic_inverse(origin, points, quantity):
+    """Return solutions of inverse geodesic problem for pairs of points, see :func:`distances`."""
+    if Geodesic is None:
+        raise Error("Ellipsoidal computations need the geographiclib package.")
+    geodesic = Geodesic.WGS84
+    outmask = getattr(Geodesic, quantity)
+    return [geodesic.Inverse(a.latitude, a.longitude, b.latitude, b.longitude, outmask)
+            for a, b in _point_pairs(origin, points)]
+
+
 class Point(geopy.Point):
     """A point on earth defined by its latitude, longitude and possibly more attributes.
 
@@ -188,6 +269,48 @@ class Polygon(Area):
         y = mean([p.longitude for p in self.points])
         return Point(x, y)
 
+    def __contains__(self, p):
+        """Return if the polygon contains a point.
+
+        The coordinates are treated as planar (as on the map) and points lying exactly on the
+        polygon border may be considered either inside or outside.
+
+        :param .Point p: Examined point.
+        """
+        return self.contains_many([p])[0]
+
+    def contains_many(self, points):
+        """Return if the polygon contains each of the points.
+
+        Polygon edges are prepared only once, so this is much faster than testing the points one by
+        one, e.g. when filtering locations of many caches.
+
+        :param points: Iterable of :class:`.Point` instances.
+        :return: Results in the same order as the points.
+        :rtype: :class:`list` of :class:`bool`
+        """
+        # (min latitude, max latitude, longitude at min latitude, longitude change per latitude)
+        edges = []
+        corners = list(self.points)
+        for a, b in zip(corners, corners[1:] + corners[:1]):
+            if a.latitude == b.latitude:
+                continue  # horizontal edges are never crossed by the ray
+            if a.latitude > b.latitude:
+                a, b = b, a
+            slope = (b.longitude - a.longitude) / (b.latitude - a.latitude)
+            edges.append((a.latitude, b.latitude, a.longitude, slope))
+
+        results = []
+        for p in points:
+            lat, lon = p.latitude, p.longitude
+            inside = False
+            # cast a ray from the point to the east and count edges crossing it
+            for lat_min, lat_max, lon_start, slope in edges:
+                if lat_min <= lat < lat_max and lon < lon_start + (lat - lat_min) * slope:
+                    inside = not inside
+            results.append(inside)
+        return results
+
     def to_tiles(self, gc, zoom=None):
         """Return list of tiles covering this area.
 
@@ -245,15 +368,36 @@ class Rectangle(Polygon):
 
         :param .Point p: Examined point.
         """
-        lats = sorted([_.latitude for _ in self.points])
-        lons = sorted([_.longitude for _ in self.points])
-        return min(lats) <= p.latitude <= max(lats) and min(lons) <= p.longitude <= max(lons)
+        return self.contains_many([p])[0]
+
+    def contains_many(self, points):
+        """Return if the rectangle contains each of the points.
+
+        :param points: Iterable of :class:`.Point` instances.
+        :return: Results in the same order as the points.
+        :rtype: :class:`list` of :class:`bool`
+        """
+        north, west = self.corners[0].latitude, self.corners[0].longitude
+        south, east = self.corners[1].latitude, self.corners[1].longitude
+        return [south <= p.latitude <= north and west <= p.longitude <= east for p in points]
 
     @property
     def diagonal(self):
         """Return a lenght of bounding box diagonal in meters as :class:`int`."""
         return geopy.distance.distance(self.corners[0], self.corners[1]).meters
 
+    def split(self):
+        """Return a list of four :class:`.Rectangle` quadrants covering this rectangle.
+
+        The quadrants are ordered from north-west to south-east, row by row.
+        """
+        (north, west), (south, east) = [(p.latitude, p.longitude) for p in self.corners]
+        lat, lon = (north + south) / 2, (west + east) / 2
+        return [Rectangle(Point(north, west), Point(lat, lon)),
+                Rectangle(Point(north, lon), Point(lat, east)),
+                Rectangle(Point(lat, west), Point(south, lon)),
+                Rectangle(Point(lat, lon), Point(south, east))]
+
 
 class Tile(object):
     """UTFGrid map tile.
@@ -271,6 +415,9 @@ class Tile(object):
         "grid":              _baseurl + "map.info",
     }
 
+    # strips parentheses and spaces from UTFGrid coordinate keys like "(12, 34)"
+    _coords_table = str.maketrans("", "", "() ")
+
     def __init__(self, geocaching, x, y, z):
         """Initialize a Tile.
 
@@ -304,15 +451,22 @@ class Tile(object):
         loading of the same tile and also a general traffic regulator involved. Try first to
         download grid and if it does not work, get .png and then try it again.
 
+        If the :class:`.Geocaching` instance has a :class:`.TileStore`, fresh tiles are returned
+        from it. Stale tiles are downloaded again, with the .png first only if it was needed last
+        time. Downloaded tiles are stored together with their download statistics.
+
         :param bool get_png: Whether to download .png first.
         :return: JSON with raw tile data.
         :rtype: :class:`dict`
         """
-        # TODO: It might be useful to store time when tile is last downloaded and act based on that.
-        # Logging some statistics (time when tile is loaded + received status code + content length
-        # + time spent on request) might help in algorithm design and evaluating if additional
-        # traffic from .png loading is tolerable and if this should be done all the time.
-        # Requesting for UTFgrid and waiting for 204 response takes also its time.
+        store = self.geocaching._tile_store
+        if store is not None and not get_png:
+            stored = store.get(self.x, self.y, self.z)
+            if stored is not None:
+                if store.is_fresh(stored):
+                    logging.debug("Using stored UTFGrid for {}".format(self))
+                    return stored.grid
+                get_png = stored.png_needed
 
         logging.debug("Downloading UTFGrid for {}".format(self))
 
@@ -332,13 +486,14 @@ class Tile(object):
         if res.status_code == 204:
             if get_png:
                 logging.debug("There is really no content! Returning 0 caches.")
+                self._store_utfgrid(None, res, get_png)
                 return
             logging.debug("Cannot load UTFgrid: no content. Trying to load .png tile first")
             return self._download_utfgrid(get_png=True)
 
         if res.status_code == 200:
             try:
-                return res.json()
+                utfgrid = res.json()
             except ValueError as e:
                 # this happened during testing, don't know why
                 if get_png:
@@ -346,6 +501,15 @@ class Tile(object):
                 else:
                     logging.debug("JSON parsing failed, trying .png first")
                     return self._download_utfgrid(get_png=True)
+            self._store_utfgrid(utfgrid, res, get_png)
+            return utfgrid
+
+    def _store_utfgrid(self, utfgrid, res, png_needed):
+        """Store a downloaded UTFGrid to the tile store, if there is any."""
+        store = self.geocaching._tile_store
+        if store is not None:
+            store.put(self.x, self.y, self.z, utfgrid, status_code=res.status_code, size=len(res.content),
+                      elapsed=res.elapsed.total_seconds(), png_needed=png_needed)
 
     def load(self):
         """Load :class:`.Block`s for this tile.
@@ -375,29 +539,44 @@ class Tile(object):
             logging.warning("UTFGrid has unexpected size.")
             self.size = size
 
-        self._blocks = {}   # format: { waypoint: <Block> }
+        self._blocks = self._decode_blocks(utfgrid["data"])
 
-        # for all non-empty in coords
-        for coordinate_key in utfgrid["data"]:
-            cache_list = utfgrid["data"][coordinate_key]
-            x, y = (int(i) for i in coordinate_key.strip(" ()").split(","))
-            point = UTFGridPoint(x, y)
-
-            # store all caches for this coords to dictionary
-            for cache in cache_list:
-                waypoint, name = cache["i"], cache["n"]
+        # try to determine grid coordinate block size
+        stats = self.geocaching._block_size_stats
+        stats.update(self._blocks.values())
+        stats.determine_size()
 
-                # if block doesn't exist yet, store it to dict
-                if waypoint not in self._blocks:
-                    self._blocks[waypoint] = Block(self, waypoint, name)
+        logging.debug("Loaded {} blocks to {}".format(len(self._blocks), self))
 
-                # extend block points
-                self._blocks[waypoint].add(point)
+    def _decode_blocks(self, data):
+        """Return :class:`.Block`s decoded from UTFGrid data.
 
-        # try to determine grid coordinate block size
-        Block.determine_block_size()
+        The coordinate keys are parsed all at once, points are then grouped by waypoints and each
+        block is created from all of its points together.
 
-        logging.debug("Loaded {} blocks to {}".format(len(self._blocks), self))
+        :param dict data: UTFGrid :code:`data` dictionary.
+        :return: Blocks by their waypoints.
+        :rtype: :class:`dict`
+        """
+        if not data:
+            return {}
+
+        keys = list(data)
+        coords = [int(i) for i in ",".join(keys).translate(self._coords_table).split(",")]
+
+        caches = {}  # format: { waypoint: (name, [points]) }
+        for key, point in zip(keys, zip(coords[0::2], coords[1::2])):
+            for cache in data[key]:
+                waypoint = cache["i"]
+                if waypoint not in caches:
+                    caches[waypoint] = cache["n"], []
+                caches[waypoint][1].append(point)
+
+        blocks = {}
+        for waypoint, (name, points) in caches.items():
+            blocks[waypoint] = Block(self, waypoint, name)
+            blocks[waypoint].update(points)
+        return blocks
 
     def precision(self, point=None):
         """Return (x-axis) coordinate precision for current tile.
@@ -421,6 +600,55 @@ class Tile(object):
         return "<object Tile, id {}, coords ({}, {}, {})>".format(id(self), self.x, self.y, self.z)
 
 
+class BlockSizeStats(object):
+    """Running statistics of sizes of loaded :class:`.Block`s.
+
+    Each :class:`.Geocaching` instance has its own statistics, updated with blocks of every loaded
+    :class:`.Tile`. They are used to determine the block size (:attr:`size`) of that instance
+    without keeping the blocks, so different instances don't overwrite each other's block size.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.size = Block.size
+        self._lock = threading.Lock()
+
+    def update(self, blocks):
+        """Add finished blocks to the statistics.
+
+        :param blocks: Iterable of :class:`.Block`s.
+        """
+        sizes = [math.sqrt(len(block)) for block in blocks]
+        with self._lock:
+            self.count += len(sizes)
+            self.total += sum(sizes)
+
+    @property
+    def mean(self):
+        """Mean block size (square root of number of points), :attr:`.Block.size` if there are no blocks.
+
+        :type: :class:`float`
+        """
+        with self._lock:
+            return self.total / self.count if self.count else Block.size
+
+    def determine_size(self):
+        """Update :attr:`size` from the blocks added so far.
+
+        :return: Determined block size.
+        :rtype: :class:`int`
+        """
+        if self.count < 20:
+            logging.warning("Trying to determine block size with small number of blocks.")
+
+        avg_block_size = round(self.mean)
+        if self.size != avg_block_size:
+            logging.warning("UTFGrid coordinate block has unexpected size.")
+            self.size = avg_block_size
+        return avg_block_size
+
+
 UTFGridPoint = namedtuple("UTFGridPoint", "x y")
 """Point inside a :class:`.Tile`.
 
@@ -429,23 +657,22 @@ Represents Xth row and Yth column in UTFGrid tile from NW corner.
 
 
 class Block(object):
-    """Container for grouped :class:`.UTFGridPoint`s inside a tile."""
+    """Container for grouped :class:`.UTFGridPoint`s inside a tile.
 
-    # this class can have a lot of instances so use __slots__
-    __slots__ = "tile", "cache_wp", "cache_name", "_points", "_xlim", "_ylim", "__weakref__"
+    The points are stored as a bitmask over the bounding box of the block (row by row, from its NW
+    corner), so that a block takes only a few dozens of bytes.
+    """
 
-    instances = []
+    # this class can have a lot of instances so use __slots__
+    __slots__ = "tile", "cache_wp", "cache_name", "_mask", "_xlim", "_ylim"
 
     # Assume that block points form a N*N matrix in the UTFGrid, or a part of it.
-    # If N cannot be determined automatically, use this fallback value.
+    # N is determined for each Geocaching instance (see BlockSizeStats), this is the fallback value.
     size = 3
 
     def __init__(self, tile=None, wp=None, name=None):
         """Initialize an empty :class:`.Block`.
 
-        Also add the new instance to class-level list of all instances, used for computing the
-        block size.
-
         :param .Tile tile: Base map tile.
         :param str wp: Waypoint of :class:`.Cache` represented by this block.
         :param str wp: Human readable name of :class:`.Cache` represented by this block.
@@ -454,77 +681,104 @@ class Block(object):
         self.cache_wp = wp
         self.cache_name = name
         self.points = []  # will trigger setting of other initial values
-        self.__class__.instances.append(weakref.ref(self))
 
     @classmethod
-    def determine_block_size(cls):
-        """Update the class-level block size from the data of all instances."""
+    @deprecated
+    def determine_block_size(cls, stats=None):
+        """Update the class-level fallback block size.
 
-        # remove invalid instances
-        cls.instances = list(filter(lambda i: i(), cls.instances))
+        .. deprecated::
+           Block size is determined for each :class:`.Geocaching` instance separately when its
+           tiles are loaded, see :meth:`.BlockSizeStats.determine_size`. Without :code:`stats`,
+           this method does nothing, because blocks are no longer tracked globally.
 
-        if len(cls.instances) < 20:
-            logging.warning("Trying to determine block size with small number of blocks.")
+        :param .BlockSizeStats stats: Statistics of blocks to determine the size from.
+        """
+        if stats is not None:
+            cls.size = stats.determine_size()
 
-        avg_block_size = round(mean((math.sqrt(len(i().points)) for i in cls.instances)))
-        if cls.size != avg_block_size:
-            logging.warning("UTFGrid coordinate block has unexpected size.")
-            cls.size = avg_block_size
+    @property
+    def _size(self):
+        """Block size determined for the :class:`.Geocaching` instance of the tile, or the fallback
+        :attr:`size` if the block has no tile.
+
+        :type: :class:`int`
+        """
+        stats = getattr(getattr(self.tile, "geocaching", None), "_block_size_stats", None)
+        return stats.size if stats is not None else self.size
 
     @property
     def points(self):
         """Individual points in grid block.
 
+        The points are decoded from an internal bit mask, so the returned set is immutable. Use
+        :meth:`add` or :meth:`update` to add points.
+
         :setter: Set new points and internally update X, Y limits.
-        :type: :class:`set`
+        :type: :class:`frozenset`
         """
-        return self._points
+        if not self._mask:
+            return frozenset()
+        (x_min, x_max), y_min = self._xlim, self._ylim[0]
+        width = x_max - x_min + 1
+        bits = bin(self._mask)[:1:-1]  # lowest bit first
+        return frozenset(UTFGridPoint(x_min + i % width, y_min + i // width)
+                         for i, bit in enumerate(bits) if bit == "1")
 
     @points.setter
     def points(self, values):
-        self._points = set()
+        self._mask = 0
         self._xlim = float("inf"), float("-inf")
         self._ylim = float("inf"), float("-inf")
         self.update(values)
 
+    def __len__(self):
+        """Return the number of points in this block."""
+        return bin(self._mask).count("1")
+
     def add(self, point):
         """Add a point to this block.
 
         :param .UTFGridPoint point: Point to add.
         """
-        point = UTFGridPoint(*point)
-        self._points.add(point)
-        self._update_limits(point)
+        self.update((point,))
 
     def update(self, points):
         """Union poins in current block with given points.
 
         :param list point: List of :class:`.UTFGridPoint`s to union with existing block points.
         """
-        for point in set(points):
-            self.add(point)
-
-    def _update_limits(self, point):
-        """Update limits used for determining block middle point.
-
-        :param .UTFGridPoint point: Point used to update limits.
-        """
-        self._xlim = min(self._xlim[0], point.x), max(self._xlim[1], point.x)
-        self._ylim = min(self._ylim[0], point.y), max(self._ylim[1], point.y)
+        points = [UTFGridPoint(*point) for point in points]
+        if not points:
+            return
+        xs, ys = zip(*points)
+        xlim = min(self._xlim[0], min(xs)), max(self._xlim[1], max(xs))
+        ylim = min(self._ylim[0], min(ys)), max(self._ylim[1], max(ys))
+        if (xlim, ylim) != (self._xlim, self._ylim):
+            # bounding box has grown, so the existing points must be encoded again
+            old_points = self.points
+            self._xlim, self._ylim = xlim, ylim
+            self._mask = 0
+            points.extend(old_points)
+
+        (x_min, x_max), y_min = self._xlim, self._ylim[0]
+        width = x_max - x_min + 1
+        for x, y in points:
+            self._mask |= 1 << ((y - y_min) * width + x - x_min)
 
     @property
     def middle_point(self):
         """A middle point of this block.
 
-        The points form a rectangular matrix, whose maximum size is :code:`self.size ** 2`, but it
+        The points form a rectangular matrix, whose maximum size is :code:`self._size ** 2`, but it
         can be smaller if the matrix is at the edge of UTFGrid. This method threat the block
         as uncut square to determine its middle point.
 
         :type: :class:`.UTFGridPoint`
         """
         self._check_block()
-        x = mean(self._get_corrected_limits(*self._xlim))
-        y = mean(self._get_corrected_limits(*self._ylim))
+        x = sum(self._get_corrected_limits(*self._xlim)) / 2
+        y = sum(self._get_corrected_limits(*self._ylim)) / 2
         return UTFGridPoint(x, y)
 
     def _check_block(self):
@@ -533,16 +787,18 @@ class Block(object):
         :raise .BadBlockError: If block is not entirely filled with points or larger than expeced.
         """
 
-        # check for missing points in rectangle
-        for x in range(self._xlim[0], self._xlim[1] + 1):
-            for y in range(self._ylim[0], self._ylim[1] + 1):
-                if UTFGridPoint(x, y) not in self.points:
-                    raise BadBlockError("Block is not entirely filled (some points are missing).")
+        # check for missing points in rectangle - the mask covers exactly the limits, so all of its
+        # bits must be set
+        width = self._xlim[1] - self._xlim[0] + 1
+        height = self._ylim[1] - self._ylim[0] + 1
+        if self._mask != (1 << width * height) - 1:
+            raise BadBlockError("Block is not entirely filled (some points are missing).")
 
         # check block size in both axes
+        size = self._size
         for lim in [self._xlim, self._ylim]:
             block_size = lim[1] - lim[0] + 1
-            if block_size > self.size:
+            if block_size > size:
                 raise BadBlockError("Block is larger than expected.")
 
     def _get_corrected_limits(self, lim_min, lim_max):
@@ -557,16 +813,18 @@ class Block(object):
         :rtype: :class:`tuple` of :class:`int`
         """
 
+        size = self._size
+
         # if block has normal size in this axis, there is no need to fix limits
-        if lim_max - lim_min + 1 == self.size:
+        if lim_max - lim_min + 1 == size:
             pass
 
         # if block touches left or up edge of tile
         elif lim_min == 0:
-            lim_min = lim_max - self.size + 1
+            lim_min = lim_max - size + 1
 
         # if block touches right or bottom edge of tile
         else:
-            lim_max = lim_min + self.size - 1
+            lim_max = lim_min + size - 1
 
         return lim_min, lim_max
@@ -3,19 +3,25 @@
 import logging
 import datetime
 import requests
-import bs4
 import json
 import subprocess
-import warnings
 import enum
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional, Union
 from urllib.parse import parse_qs, urljoin, urlparse
 from os import path
 from pycaching.cache import Cache, Size
 from pycaching.log import Log, Type as LogType
-from pycaching.geo import Point, Rectangle
+from pycaching.geo import Point, Rectangle, BlockSizeStats
 from pycaching.trackable import Trackable
-from pycaching.errors import Error, NotLoggedInException, LoginFailedException, PMOnlyException, TooManyRequestsError
+from pycaching.errors import (Error, NotLoggedInException, LoginFailedException, PMOnlyException,
+                              TooManyRequestsError, ValueError as PycachingValueError)
+from pycaching.util import (parallel_map, read_ahead, endpoint_class, default_html_parser, parse_html,
+                            PageRegions)
 
 
 class SortOrder(enum.Enum):
@@ -33,6 +39,98 @@ class SortOrder(enum.Enum):
     terrain = "terrain"
 
 
+CacheLoadResult = namedtuple("CacheLoadResult", "key cache error")
+"""Result of loading one cache by :meth:`.Geocaching.get_caches`.
+
+Contains the requested waypoint or GUID (:code:`key`), the :class:`.Cache` (:code:`None` if it
+couldn't be created) and the :class:`.Error` raised while loading it (:code:`None` on success).
+"""
+
+
+class SearchCursor(object):
+    """Position in results of :meth:`.Geocaching.search_rect`, which can be saved and resumed later.
+
+    Holds the search parameters, number of caches already returned (:code:`offset`) and the total
+    number of results seen by the last query (:code:`total`, :code:`None` before the first one).
+    Pass it to :meth:`.Geocaching.search_rect` as :code:`resume` and it is advanced with every
+    returned cache, so an interrupted search continues where it stopped.
+    """
+
+    def __init__(self, rect, *, per_query=200, sort_by=SortOrder.date_last_visited, origin=None, asc=True,
+                 offset=0, total=None):
+        """Create a cursor at the beginning (or at given :code:`offset`) of search results.
+
+        For the parameters, see :meth:`.Geocaching.search_rect`.
+        """
+        if not isinstance(sort_by, SortOrder):
+            sort_by = SortOrder(sort_by)
+        if sort_by is SortOrder.distance:
+            assert isinstance(origin, Point)
+
+        self.rect = rect
+        self.per_query = per_query
+        self.sort_by = sort_by
+        self.origin = origin
+        self.asc = asc
+        self.offset = offset
+        self.total = total
+
+    @property
+    def finished(self):
+        """Whether all results seen by the last query were returned.
+
+        :type: :class:`bool`
+        """
+        return self.total is not None and self.offset >= self.total
+
+    def to_dict(self):
+        """Return the cursor as a JSON serializable :class:`dict`."""
+        return {
+            "rect": [[p.latitude, p.longitude] for p in self.rect.corners],
+            "per_query": self.per_query,
+            "sort_by": self.sort_by.value,
+            "origin": [self.origin.latitude, self.origin.longitude] if self.origin else None,
+            "asc": self.asc,
+            "offset": self.offset,
+            "total": self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a cursor from a :class:`dict` returned by :meth:`to_dict`."""
+        return cls(
+            Rectangle(*(Point(*corner) for corner in data["rect"])),
+            per_query=data["per_query"],
+            sort_by=data["sort_by"],
+            origin=Point(*data["origin"]) if data["origin"] else None,
+            asc=data.get("asc", True),
+            offset=data["offset"],
+            total=data["total"],
+        )
+
+    def save(self, filename):
+        """Save the cursor to a file.
+
+        The file is replaced atomically, so it is safe to save the cursor often during a search.
+
+        :param str filename: Path to the file.
+        """
+        temp = "{}.tmp".format(filename)
+        with open(temp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temp, filename)
+
+    @classmethod
+    def load(cls, filename):
+        """Load a cursor saved by :meth:`save`.
+
+        :param str filename: Path to the file.
+        :raise .FileNotFoundError: If the file doesn't exist.
+        """
+        with open(filename, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
 class Geocaching(object):
     """Provides some basic methods for communicating with geocaching.com website.
 
@@ -50,12 +148,46 @@ class Geocaching(object):
     }
     _credentials_file = ".gc_credentials"
 
-    def __init__(self, *, session=None):
+    # parts of the first search page used by search(), the rest is not parsed at all
+    _search_regions = PageRegions(ids=["geocaches"], classes=["cache-sizes-wrapper"])
+
+    def __init__(self, *, session=None, rate_limiter=None, response_cache=None, parser=None,
+                 parse_processes=None, tile_store=None, cache_store=None):
+        """Create a Geocaching instance.
+
+        :param requests.Session session: Session to use for requests. If :code:`None`, a new one is
+            created.
+        :param .RateLimiter rate_limiter: Rate limiter used to pace the requests. If :code:`None`,
+            the requests are not paced.
+        :param .ResponseCache response_cache: Cache of downloaded pages. If :code:`None`, all pages
+            are always downloaded.
+        :param str parser: BeautifulSoup HTML parser used for all pages, eg. :code:`lxml` or
+            :code:`html.parser`. If :code:`None`, the fastest available one is used, see
+            :func:`.util.default_html_parser`.
+        :param int parse_processes: Number of processes used to parse the downloaded pages. If set,
+            parsing of cache pages and search results runs in a process pool, so that loading from
+            many threads (e.g. by :meth:`get_caches`) is not limited by GIL. Call :meth:`close`
+            to stop the processes. If :code:`None`, pages are parsed in the calling thread.
+        :param .TileStore tile_store: Store of downloaded map tiles used by :meth:`search_quick`. If
+            :code:`None`, the tiles are always downloaded.
+        :param .CacheStore cache_store: Persistent store of cache properties, written through when
+            caches are loaded or searched and used by lazy loading and :meth:`get_cache`. If
+            :code:`None`, cache properties are kept only in memory.
+        """
         self._logged_in = False
         self._logged_username = None
         self._session = session or requests.Session()
-
-    def _request(self, url, *, expect="soup", method="GET", login_check=True, **kwargs):
+        self._rate_limiter = rate_limiter
+        self._response_cache = response_cache
+        self._parser = parser or default_html_parser()
+        self._parse_processes = parse_processes
+        self._parse_pool = None
+        self._parse_pool_lock = threading.Lock()
+        self._tile_store = tile_store
+        self._cache_store = cache_store
+        self._block_size_stats = BlockSizeStats()
+
+    def _request(self, url, *, expect="soup", method="GET", login_check=True, parse_only=None, **kwargs):
         """
         Do a HTTP request and return a response based on expect param.
 
@@ -63,6 +195,8 @@ class Geocaching(object):
         :param str method: HTTP method to use.
         :param str expect: Expected type of data (either :code:`soup`, :code:`json` or :code:`raw`).
         :param bool login_check: Whether to check if user is logged in or not.
+        :param .PageRegions parse_only: Parts of the page to parse, if :code:`expect` is :code:`soup`.
+            If :code:`None`, the whole page is parsed.
         :param kwargs: Passed to `requests.request
             <http://docs.python-requests.org/en/latest/api/#requests.request>`_ as is.
         """
@@ -73,19 +207,19 @@ class Geocaching(object):
         url = url if "//" in url else urljoin(self._baseurl, url)
 
         try:
-            res = self._session.request(method, url, **kwargs)
+            res = self._fetch(method, url, **kwargs)
             res.raise_for_status()
 
             # return bs4.BeautifulSoup, JSON dict or raw requests.Response
             if expect == "soup":
-                return bs4.BeautifulSoup(res.text, "html.parser")
+                return self._parse_html(res.text, parse_only)
             elif expect == "json":
                 return res.json()
             elif expect == "raw":
                 return res
 
         except requests.exceptions.RequestException as e:
-            if e.response.status_code == 429:  # Handle rate limiting errors
+            if e.response is not None and e.response.status_code == 429:  # Handle rate limiting errors
                 raise TooManyRequestsError(
                     url,
                     rate_limit_reset=int(e.response.headers.get('x-rate-limit-reset', '0'))
@@ -93,18 +227,99 @@ class Geocaching(object):
 
             raise Error("Cannot load page: {}".format(url)) from e
 
-    def login(self, username=None, password=None):
+    def _parse_html(self, markup, parse_only=None):
+        """Return a :class:`bs4.BeautifulSoup` object parsed by the parser of this instance.
+
+        :param str markup: HTML to parse.
+        :param .PageRegions parse_only: Parts of the page to parse, see :meth:`_request`.
+        """
+        return parse_html(markup, self._parser, parse_only=parse_only)
+
+    def _parse(self, func, *args, **kwargs):
+        """Run a page parsing function, in the pool of parsing processes if it is enabled.
+
+        :param callable func: Pure function returning plain data, which accepts :code:`parser`
+            keyword argument, e.g. :meth:`.Cache._parse_details_page`.
+        :param args: Positional arguments of the function.
+        :param kwargs: Keyword arguments of the function.
+        """
+        if not self._parse_processes:
+            return func(*args, parser=self._parser, **kwargs)
+
+        with self._parse_pool_lock:
+            if self._parse_pool is None:
+                logging.debug("Starting {} parsing processes".format(self._parse_processes))
+                self._parse_pool = ProcessPoolExecutor(max_workers=self._parse_processes)
+            pool = self._parse_pool
+        return pool.submit(func, *args, parser=self._parser, **kwargs).result()
+
+    def close(self):
+        """Stop the parsing processes, if there are any running.
+
+        The instance can still be used afterwards, the processes are started again when needed.
+        """
+        with self._parse_pool_lock:
+            pool, self._parse_pool = self._parse_pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def _fetch(self, method, url, **kwargs):
+        """Return a :class:`requests.Response` either from response cache or from the network.
+
+        Stale cached responses are revalidated by a conditional request, if possible.
+        """
+        endpoint = endpoint_class(url)
+
+        cache, key, cached = self._response_cache, None, None
+        if cache is not None and method == "GET" and cache.ttl(endpoint):
+            key = cache.key(url, kwargs.get("params"), self._logged_username)
+            cached = cache.get(key)
+            if cached is not None:
+                if cached.age < cache.ttl(endpoint):
+                    logging.debug("Using cached response for {}".format(url))
+                    return cached.to_response()
+                kwargs["headers"] = dict(kwargs.get("headers") or {}, **cached.validators())
+
+        if self._rate_limiter:
+            self._rate_limiter.acquire(endpoint)
+        res = self._session.request(method, url, **kwargs)
+        if self._rate_limiter:
+            self._rate_limiter.update(endpoint, res.headers, limited=res.status_code == 429)
+
+        if key is not None:
+            if res.status_code == 304 and cached is not None:
+                logging.debug("Cached response for {} revalidated".format(url))
+                cache.refresh(key)
+                return cached.to_response()
+            if res.status_code == 200:
+                cache.put(key, res)
+
+        return res
+
+    def login(self, username=None, password=None, *, session_file=None):
         """Log in the user for this instance of Geocaching.
 
-        If username or password is not set, try to load credentials from file. Then load login page
-        and do some checks about currently logged user. As a last thing post the login form and
-        check result.
+        If a session file is given, try to restore a previously saved session from it first (see
+        :meth:`load_session`). If username or password is not set, try to load credentials from
+        file. Then load login page and do some checks about currently logged user. As a last thing
+        post the login form and check result.
 
         :param str username: User's username or :code:`None` to use data from credentials file.
         :param str password: User's password or :code:`None` to use data from credentials file.
+        :param str session_file: Path to a file to restore the session from and to save it to
+            after successful login.
         :raise .LoginFailedException: If login fails either because of bad credentials or
             non-existing credentials file.
         """
+        if session_file is not None and not self._logged_in:
+            try:
+                if self.load_session(session_file, username=username):
+                    return
+            except FileNotFoundError:
+                logging.debug("Session file not found, logging in normally.")
+            except (IOError, ValueError, KeyError, TypeError) as e:
+                logging.warning("Cannot restore session from file: {!r}".format(e))
+
         logging.info("Logging in...")
 
         if not username or not password:
@@ -154,6 +369,8 @@ class Geocaching(object):
             logging.info("Logged in successfully as {}.".format(username))
             self._logged_in = True
             self._logged_username = username
+            if session_file is not None:
+                self.save_session(session_file)
             return
         else:
             self.logout()
@@ -221,6 +438,83 @@ class Geocaching(object):
                 raise KeyError("No password was key found. "
                                "Use either \"password\" or \"password_cmd\".")
 
+    def save_session(self, filename):
+        """Save the session of logged user to a file.
+
+        The file contains authentication cookies, so it is readable only by its owner. Use
+        :meth:`load_session` to restore the session later, without the need to log in again.
+
+        :param str filename: Path to the file.
+        :raise .NotLoggedInException: If no user is logged in.
+        """
+        if not self._logged_in:
+            raise NotLoggedInException("Login is needed.")
+
+        cookies = [{
+            "name": c.name,
+            "value": c.value,
+            "domain": c.domain,
+            "path": c.path,
+            "expires": c.expires,
+            "secure": c.secure,
+        } for c in self._session.cookies]
+
+        logging.debug("Saving session of {} to {}".format(self._logged_username, filename))
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        if hasattr(os, "fchmod"):  # the mode above doesn't apply to an existing file
+            os.fchmod(fd, 0o600)
+        with open(fd, "w") as f:
+            json.dump({"username": self._logged_username, "cookies": cookies}, f)
+
+    def load_session(self, filename, *, username=None, validate=True):
+        """Restore a session saved by :meth:`save_session`.
+
+        Session cookies are checked for expiration locally at first. If the session is still valid,
+        it is verified by loading a single page (unless :code:`validate` is :code:`False`).
+
+        :param str filename: Path to the file.
+        :param str username: If set, restore the session only if it belongs to this user.
+        :param bool validate: Whether to verify the session on geocaching.com.
+        :return: Whether the session was restored and the user is now logged in.
+        :rtype: :class:`bool`
+        :raise .FileNotFoundError: If the session file doesn't exist.
+        """
+        with open(filename, "r") as f:
+            saved = json.load(f)
+
+        if username is not None and saved["username"] != username:
+            logging.info("Saved session belongs to a different user.")
+            return False
+
+        cookies = [requests.cookies.create_cookie(**c) for c in saved["cookies"]]
+        cookies = [c for c in cookies if not c.is_expired()]
+        if not cookies:
+            logging.info("Saved session has expired.")
+            return False
+
+        jar = self._session.cookies
+        keys = {(c.domain, c.path, c.name) for c in cookies}
+        replaced = [c for c in jar if (c.domain, c.path, c.name) in keys]
+        for cookie in cookies:
+            jar.set_cookie(cookie)
+
+        if validate and self.get_logged_user() != saved["username"]:
+            logging.info("Saved session is no longer valid.")
+            # remove only the restored cookies and put back those they replaced
+            for key in keys:
+                try:
+                    jar.clear(*key)
+                except KeyError:
+                    pass
+            for cookie in replaced:
+                jar.set_cookie(cookie)
+            return False
+
+        logging.info("Session of {} restored.".format(saved["username"]))
+        self._logged_in = True
+        self._logged_username = saved["username"]
+        return True
+
     def logout(self):
         """Log out the user for this instance."""
         logging.info("Logging out.")
@@ -244,7 +538,7 @@ class Geocaching(object):
         except AttributeError:
             return None
 
-    def search(self, point, limit=float("inf")):
+    def search(self, point, limit=float("inf"), *, prefetch=0):
         """Return a generator of caches around some point.
 
         Search for caches around some point by loading search pages and parsing the data from these
@@ -253,68 +547,54 @@ class Geocaching(object):
 
         :param .geo.Point point: Search center point.
         :param int limit: Maximum number of caches to generate.
+        :param int prefetch: Number of result pages to load in a background thread ahead of the
+            page being currently generated. If :code:`0`, each page is loaded only when its caches
+            are needed. Prefetching may download a few pages more than needed to reach the limit.
         """
         logging.info("Searching at {}".format(point))
 
+        pages = self._search_pages(point)
+        if prefetch:
+            pages = read_ahead(pages, prefetch)
+
+        try:
+            for rows in pages:
+                # create cache objects, values are sanitized and converted in Cache setters
+                for row in rows:
+
+                    limit -= 1  # handle limit
+                    if limit < 0:
+                        return
+
+                    c = Cache(self, **row)
+                    c._store(row)
+                    logging.debug("Cache parsed: {}".format(c))
+                    yield c
+        finally:
+            pages.close()
+
+    def _search_pages(self, point):
+        """Return a generator of search result pages around some point.
+
+        :param .geo.Point point: Search center point.
+        :return: Generator of lists of cache property mappings, see :meth:`_parse_search_page`.
+        """
         start_index = 0
+        size_mapping = None
         while True:
             # get one page
-            geocaches_table, whole_page = self._search_get_page(point, start_index)
-            rows = geocaches_table.find_all("tr")
+            source = self._search_get_page(point, start_index)
+            rows, size_mapping = self._parse(self._parse_search_page, source, size_mapping=size_mapping)
 
             # leave loop if there are no (more) results
             if not rows:
                 return
 
-            # prepare language-dependent mappings
-            if start_index == 0:
-                cache_sizes_filter_wrapper = whole_page.find("div", class_="cache-sizes-wrapper")
-                localized_size_mapping = {
-                    # key = "Small" (localized), value = Size.small
-                    label.find("span").text.strip(): Size.from_number(label.find("input").get("value"))
-                    for label in cache_sizes_filter_wrapper.find_all("label")
-                }
-
-            # parse caches in result
-            for start_index, row in enumerate(rows, start_index):
-
-                limit -= 1  # handle limit
-                if limit < 0:
-                    return
-
-                # parse raw data
-                cache_details = row.find("span", "cache-details").text.split("|")
-                wp = cache_details[1].strip()
-
-                # create and fill cache object
-                # values are sanitized and converted in Cache setters
-                c = Cache(self, wp)
-                c.type = cache_details[0]
-                c.name = row.find("span", "cache-name").text
-                badge = row.find("svg", class_="badge")
-                c.found = "found" in str(badge) if badge is not None else False
-                c.favorites = row.find(attrs={"data-column": "FavoritePoint"}).text
-                c.state = not (row.get("class") and "disabled" in row.get("class"))
-                c.pm_only = row.find("td", "pm-upsell") is not None
-
-                if c.pm_only:
-                    # PM only caches doesn't have other attributes filled in
-                    yield c
-                    continue
-
-                c.size = localized_size_mapping[row.find(attrs={"data-column": "ContainerSize"}).text.strip()]
-                c.difficulty = row.find(attrs={"data-column": "Difficulty"}).text
-                c.terrain = row.find(attrs={"data-column": "Terrain"}).text
-                c.hidden = row.find(attrs={"data-column": "PlaceDate"}).text
-                c.author = row.find("span", "owner").text[3:]  # delete "by "
-
-                logging.debug("Cache parsed: {}".format(c))
-                yield c
-
-            start_index += 1
+            yield rows
+            start_index += len(rows)
 
     def _search_get_page(self, point, start_index):
-        """Return one page for standard search as class:`bs4.BeautifulSoup` object.
+        """Return HTML of one page for standard search.
 
         :param .geo.Point point: Search center point.
         :param int start_index: Determines the page. If start_index is greater than zero, this
@@ -328,10 +608,9 @@ class Geocaching(object):
             logging.debug("Using normal search endpoint")
 
             # make request
-            res = self._request(self._urls["search"], params={
+            return self._request(self._urls["search"], params={
                 "origin": point.format_decimal(),
-            })
-            return res.find(id="geocaches"), res
+            }, expect="raw").text
 
         else:
             # other requests can use AJAX endpoint
@@ -345,9 +624,63 @@ class Geocaching(object):
                 "selectAll": "false",
             }, expect="json")
 
-            return bs4.BeautifulSoup(res["HtmlString"].strip(), "html.parser"), None
+            return res["HtmlString"].strip()
+
+    @staticmethod
+    def _parse_search_page(source, parser, size_mapping=None):
+        """Return cache properties parsed from one page of search results.
+
+        A pure function of the page source, so it can be run in another process.
 
-    def search_quick(self, area, *, strict=False, zoom=None):
+        :param str source: HTML of the page, see :meth:`_search_get_page`.
+        :param str parser: BeautifulSoup HTML parser to use.
+        :param dict size_mapping: Mapping of localized size names to :class:`.cache.Size`, as
+            returned for the first page. If :code:`None`, the source is treated as the first page.
+        :return: Tuple of (list of mappings of cache property names to their values, size mapping).
+        """
+        if size_mapping is None:
+            whole_page = parse_html(source, parser, parse_only=Geocaching._search_regions)
+            rows = whole_page.find(id="geocaches").find_all("tr")
+
+            # prepare language-dependent mappings
+            cache_sizes_filter_wrapper = whole_page.find("div", class_="cache-sizes-wrapper")
+            size_mapping = {
+                # key = "Small" (localized), value = Size.small
+                label.find("span").text.strip(): Size.from_number(label.find("input").get("value"))
+                for label in cache_sizes_filter_wrapper.find_all("label")
+            }
+        else:
+            rows = parse_html(source, parser).find_all("tr")
+
+        results = []
+        for row in rows:
+            # parse raw data
+            cache_details = row.find("span", "cache-details").text.split("|")
+            badge = row.find("svg", class_="badge")
+
+            data = {
+                "wp": cache_details[1].strip(),
+                "type": cache_details[0],
+                "name": row.find("span", "cache-name").text,
+                "found": "found" in str(badge) if badge is not None else False,
+                "favorites": row.find(attrs={"data-column": "FavoritePoint"}).text,
+                "state": not (row.get("class") and "disabled" in row.get("class")),
+                "pm_only": row.find("td", "pm-upsell") is not None,
+            }
+
+            # PM only caches doesn't have other attributes filled in
+            if not data["pm_only"]:
+                data["size"] = size_mapping[row.find(attrs={"data-column": "ContainerSize"}).text.strip()]
+                data["difficulty"] = row.find(attrs={"data-column": "Difficulty"}).text
+                data["terrain"] = row.find(attrs={"data-column": "Terrain"}).text
+                data["hidden"] = row.find(attrs={"data-column": "PlaceDate"}).text
+                data["author"] = row.find("span", "owner").text[3:]  # delete "by "
+
+            results.append(data)
+
+        return results, size_mapping
+
+    def search_quick(self, area, *, strict=False, zoom=None, concurrency=4):
         """Return a generator of caches in some area.
 
         Area is converted to map tiles, each tile is then loaded and :class:`.Cache` objects are then
@@ -357,37 +690,43 @@ class Geocaching(object):
         :param int zoom: Zoom level of tiles. You can also specify it manually, otherwise it is
             automatically determined for whole :class:`.Area` to fit into one :class:`.Tile`. Higher
             zoom level is more precise, but requires more tiles to be loaded.
+        :param int concurrency: Maximum number of tiles loaded at the same time. Caches are yielded
+            tile by tile, as soon as each tile is loaded.
         """
-        # FIXME
-        warnings.warn("Quick search is temporary disabled because of Groundspeak breaking change. "
-                      "If you would like to use it, please consider helping with this issue: "
-                      "https://github.com/tomasbedrich/pycaching/issues/75")
-        raise NotImplementedError()
-
-        # logging.info("Searching quick in {}".format(area))
-        #
-        # tiles = area.to_tiles(self, zoom)
-        # # TODO process tiles by multiple workers
-        # for tile in tiles:
-        #     for block in tile.blocks:
-        #         cache = Cache.from_block(block)
-        #         if strict and cache.location not in area:
-        #             # if strict mode is on and cache is not in area
-        #             continue
-        #         else:
-        #             # can yield more caches (which are not exactly in desired area)
-        #             yield cache
+        logging.info("Searching quick in {}".format(area))
+
+        def load(tile):
+            tile.load()
+            return tile
+
+        tiles = parallel_map(load, area.to_tiles(self, zoom), workers=concurrency, ordered=False)
+        try:
+            for tile in tiles:
+                caches = [Cache.from_block(block) for block in tile.blocks]
+                if strict:
+                    # if strict mode is on, discard caches which are not in area
+                    inside = area.contains_many(cache.location for cache in caches)
+                    caches = [cache for cache, is_inside in zip(caches, inside) if is_inside]
+                # otherwise can yield more caches (which are not exactly in desired area)
+                yield from caches
+        finally:
+            tiles.close()
 
     # add some shortcuts ------------------------------------------------------
 
     def search_rect(
         self,
-        rect: Rectangle,
+        rect: Optional[Rectangle] = None,
         *,
         per_query: int = 200,
         sort_by: Union[str, SortOrder] = SortOrder.date_last_visited,
         origin: Optional[Point] = None,
-        wait_sleep: bool = True
+        asc: bool = True,
+        wait_sleep: bool = True,
+        concurrency: int = 1,
+        ordered: bool = True,
+        split_over: Optional[int] = None,
+        resume: Optional[SearchCursor] = None
     ):
         """
         Return a generator of caches in given Rectange area.
@@ -396,47 +735,215 @@ class Geocaching(object):
         :param int per_query: Number of caches requested in single query.
         :param sort_by: Order cached by given criterion.
         :param origin: Origin point for search by distance.
+        :param bool asc: Whether to sort in ascending order. Use :code:`False` e.g. to get the
+            recently visited or placed caches first.
         :param wait_sleep: In case of rate limits exceeding, wait appropriate time if set True,
-            otherwise just yield None.
+            otherwise just yield None. If a rate limiter is used, it does the waiting.
+        :param int concurrency: Maximum number of queries running at the same time. The first query
+            is always done alone to learn the total number of results, the rest of them is then
+            requested in parallel. Use a :class:`.RateLimiter` to keep the queries within the rate
+            limits.
+        :param bool ordered: Whether to yield caches in the requested sort order, or page by page as
+            soon as the queries finish. Only has effect if :code:`concurrency` is greater than one.
+        :param int split_over: If set, the area is recursively split into quadrants (see
+            :meth:`.Rectangle.split`) until each of them contains at most this number of caches,
+            so that no deep offsets are requested. The quadrants are then searched in parallel by
+            :code:`concurrency` workers. Caches are yielded quadrant by quadrant, so the sort order
+            holds only within each of them. Each cache is yielded only once, even if it lies on
+            a boundary of more quadrants.
+        :param .SearchCursor resume: Cursor to continue the search from. The search parameters
+            (:code:`rect`, :code:`per_query`, :code:`sort_by`, :code:`origin` and :code:`asc`) are
+            taken from it and the cursor is advanced with every returned cache, so it can be saved
+            and used to resume the search later. Cannot be combined with :code:`split_over` or
+            unordered concurrent search.
+        :raise .ValueError: If neither :code:`rect` nor :code:`resume` is set, or if :code:`resume` is
+            combined with an unsupported search mode.
         """
-        if not isinstance(sort_by, SortOrder):
-            sort_by = SortOrder(sort_by)
+        if rect is None and resume is None:
+            raise PycachingValueError("Either rect or resume must be set.")
+        if resume is not None and (split_over is not None or (concurrency > 1 and not ordered)):
+            raise PycachingValueError("Cannot resume a search split to quadrants or an unordered one.")
+
+        cursor = resume or SearchCursor(rect, per_query=per_query, sort_by=sort_by, origin=origin, asc=asc)
+        rect, per_query = cursor.rect, cursor.per_query
 
         params = {
-            "box": "{},{},{},{}".format(
-                rect.corners[0].latitude,
-                rect.corners[0].longitude,
-                rect.corners[1].latitude,
-                rect.corners[1].longitude,
-            ),
             "take": per_query,
-            "asc": "true",
+            "asc": "true" if cursor.asc else "false",
             "skip": 0,
-            "sort": sort_by.value,
+            "sort": cursor.sort_by.value,
         }
 
-        if sort_by is SortOrder.distance:
-            assert isinstance(origin, Point)
-            params["origin"] = "{},{}".format(origin.latitude, origin.longitude)
-
-        total, offset = None, 0
-        while (total is None) or (offset < total):
-            params["skip"] = offset
+        if cursor.sort_by is SortOrder.distance:
+            params["origin"] = "{},{}".format(cursor.origin.latitude, cursor.origin.longitude)
+
+        def load_page(offset, area=rect):
+            """Return the query result, or None if the rate limit is exceeded and we should not wait."""
+            box = "{},{},{},{}".format(
+                area.corners[0].latitude,
+                area.corners[0].longitude,
+                area.corners[1].latitude,
+                area.corners[1].longitude,
+            )
+            while True:
+                try:
+                    return self._request(self._urls["api_search"], params=dict(params, box=box, skip=offset),
+                                         expect="json")
+                except TooManyRequestsError as e:
+                    if not wait_sleep:
+                        return None
+                    if not self._rate_limiter:  # rate limiter already paused further requests
+                        e.wait_for()
+
+        if split_over is not None:
+            yield from self._search_rect_split(rect, load_page, split_over, concurrency, ordered)
+            return
 
-            try:
-                resp = self._request(self._urls["api_search"], params=params, expect="json")
-            except TooManyRequestsError as e:
-                if wait_sleep:
-                    e.wait_for()
-                else:
-                    yield None
-                continue
+        def load_offset(offset):
+            # pair the pages with their offsets, so the failed ones can be repeated
+            return offset, load_page(offset)
 
+        def page_caches(resp):
+            cursor.total = resp["total"]
             for record in resp["results"]:
+                cursor.offset += 1
                 yield Cache._from_api_record(self, record)
 
-            total = resp["total"]
-            offset += per_query
+        # the first query tells the total number of results
+        start = cursor.offset
+        resp = load_page(start)
+        while resp is None:
+            yield None
+            resp = load_page(start)
+
+        yield from page_caches(resp)
+
+        offsets = range(start + per_query, resp["total"], per_query)
+        if concurrency > 1:
+            pages = parallel_map(load_offset, offsets, workers=concurrency, ordered=ordered)
+        else:
+            pages = (load_offset(offset) for offset in offsets)
+
+        try:
+            for offset, resp in pages:
+                while resp is None:
+                    yield None
+                    resp = load_page(offset)
+
+                yield from page_caches(resp)
+        finally:
+            pages.close()
+
+    def _search_rect_split(self, rect, load_page, split_over, concurrency, ordered):
+        """Return a generator of caches in an area searched by quadrants, see :meth:`search_rect`."""
+
+        def crawl(task):
+            """Return all result records of an area, or its quadrants if it has too many results.
+
+            The task is a pair of the area and its records loaded before. Quadrants are :code:`None`
+            if the rate limit is exceeded and we should not wait, the records are then partial and
+            the area is crawled again from their offset.
+            """
+            area, records = task
+            records = list(records)
+            total = None
+            while total is None or len(records) < total:
+                resp = load_page(len(records), area)
+                if resp is None:
+                    return area, records, None
+                if not records and resp["total"] > split_over and self._can_split(area):
+                    return area, [], area.split()
+                total = resp["total"]
+                if not resp["results"]:
+                    break
+                records.extend(resp["results"])
+            return area, records, []
+
+        seen = set()
+        tasks = [(rect, [])]
+        while tasks:
+            if concurrency > 1:
+                results = parallel_map(crawl, tasks, workers=concurrency, ordered=ordered)
+            else:
+                results = (crawl(task) for task in tasks)
+
+            tasks = []
+            try:
+                for area, records, quadrants in results:
+                    for record in records:
+                        if record["code"] not in seen:
+                            seen.add(record["code"])
+                            yield Cache._from_api_record(self, record)
+
+                    if quadrants is None:
+                        yield None
+                        tasks.append((area, records))
+                    else:
+                        tasks.extend((quadrant, []) for quadrant in quadrants)
+            finally:
+                results.close()
+
+    @staticmethod
+    def _can_split(area):
+        """Return whether the area is large enough to be split into quadrants.
+
+        Stops the splitting on places with more caches than the threshold at the same location.
+        """
+        return abs(area.corners[0].latitude - area.corners[1].latitude) > 1e-5
+
+    def sync_rect(self, rect, *, sort_by=SortOrder.date_last_visited, per_query=200, stop_after=10):
+        """Return a generator of caches in an area, which changed since they were stored.
+
+        Update the cache store (see :class:`.CacheStore`) with an area searched by
+        :meth:`search_rect`, the most recently visited (or placed) caches first. A cache is
+        unchanged, if its properties are identical to the previous search result (see
+        :meth:`.CacheStore.changed_in_search`) and it is followed by the same cache as in the previous
+        sync. A new log of any kind moves the cache to the top of the
+        results, so it is reported even if none of its properties changed. The search stops after
+        :code:`stop_after` consecutive unchanged caches, because the rest of the results is older
+        and was already stored by a previous sync. So the first sync of an area goes through all its
+        caches, the next ones need only a few queries.
+
+        :param .Rectangle rect: Synced area.
+        :param sort_by: Order of the search, either :attr:`.SortOrder.date_last_visited` to catch
+            caches with new logs, or :attr:`.SortOrder.place_date` to catch only the new caches.
+        :param int per_query: Number of caches requested in single query.
+        :param int stop_after: Number of consecutive unchanged caches to stop the sync at. Raise it
+            if many caches share the same visit date, as their order is not defined.
+        :return: Generator of new or changed :class:`.Cache` objects.
+        :raise .ValueError: If there is no cache store or the sort order is not supported.
+        """
+        if self._cache_store is None:
+            raise PycachingValueError("Syncing needs a cache store.")
+        sort_by = SortOrder(sort_by)
+        if sort_by not in (SortOrder.date_last_visited, SortOrder.place_date):
+            raise PycachingValueError("Cannot sync caches ordered by {}.".format(sort_by.value))
+
+        logging.info("Syncing caches in {}".format(rect))
+        store = self._cache_store
+        area = "{},{},{},{}:{}".format(rect.corners[0].latitude, rect.corners[0].longitude,
+                                       rect.corners[1].latitude, rect.corners[1].longitude, sort_by.value)
+        started = time.time()
+        unchanged = 0
+        caches = self.search_rect(rect, per_query=per_query, sort_by=sort_by, asc=False)
+        try:
+            # a cache is compared when its successor is known
+            cache = next(caches, None)
+            while cache is not None:
+                successor = next(caches, None)
+                successor_wp = successor.wp if successor else None
+                moved = store.replace_successor(area, cache.wp, successor_wp) != successor_wp
+                if moved or store.changed_in_search(cache.wp, started):
+                    unchanged = 0
+                    yield cache
+                else:
+                    unchanged += 1
+                    if unchanged >= stop_after:
+                        logging.debug("Sync reached stored caches at {}".format(cache))
+                        return
+                cache = successor
+        finally:
+            caches.close()
 
     def geocode(self, location):
         """Return a :class:`.Point` object from geocoded location.
@@ -460,6 +967,43 @@ class Geocaching(object):
             return Cache(self, wp)
         return self._cache_from_guid(guid)
 
+    def get_caches(self, keys, *, mode="full", concurrency=8, ordered=True):
+        """Return a generator of caches loaded in parallel.
+
+        Load caches using multiple threads sharing this instance. Loading errors are not raised,
+        but reported per cache, so one failing cache doesn't abort the rest of the batch.
+
+        :param keys: Iterable of cache waypoints (or GUIDs in :code:`guid` mode).
+        :param str mode: Loading method - :code:`full` uses :meth:`.Cache.load`, :code:`quick`
+            uses :meth:`.Cache.load_quick` and :code:`guid` loads the caches by their GUID the same
+            way as :meth:`get_cache` does.
+        :param int concurrency: Maximum number of caches loaded at the same time.
+        :param bool ordered: Whether to yield results in the same order as :code:`keys`, or as soon
+            as they are loaded.
+        :return: Generator of :class:`.CacheLoadResult`.
+        """
+        if mode not in ("full", "quick", "guid"):
+            raise PycachingValueError("Unknown loading mode '{}'.".format(mode))
+
+        def load(key):
+            cache = None
+            try:
+                if mode == "guid":
+                    cache = self._cache_from_guid(key)
+                else:
+                    cache = Cache(self, key)
+                    if mode == "full":
+                        cache.load()
+                    else:
+                        cache.load_quick()
+            except Error as e:
+                logging.debug("Cache {} cannot be loaded: {!r}".format(key, e))
+                return CacheLoadResult(key, cache, e)
+            return CacheLoadResult(key, cache, None)
+
+        logging.info("Loading caches, {} at once".format(concurrency))
+        return parallel_map(load, keys, workers=concurrency, ordered=ordered)
+
     def get_trackable(self, tid):
         """Return a :class:`.Trackable` object by its trackable ID.
 
@@ -482,9 +1026,16 @@ class Geocaching(object):
         self.get_cache(wp).post_log(log)
 
     def _cache_from_guid(self, guid):
+        if self._cache_store is not None:
+            wp = self._cache_store.find_wp(guid)
+            if wp is not None:
+                cache = Cache(self, wp)
+                if cache._load_stored():
+                    logging.debug("Cache with GUID {!r} found in cache store".format(guid))
+                    return cache
         logging.info('Loading cache with GUID {!r}'.format(guid))
-        print_page = self._request(Cache._urls["print_page"], params={"guid": guid})
-        return Cache._from_print_page(self, guid, print_page)
+        print_page = self._request(Cache._urls["print_page"], params={"guid": guid}, expect="raw")
+        return Cache._from_print_page(self, guid, print_page.text)
 
     def _try_getting_cache_from_guid(self, guid):
         """Try to get a cache from guid page if possible, otherwise from gccode.
@@ -511,7 +1062,7 @@ class Geocaching(object):
             if isinstance(log_type, LogType):
                 log_type = log_type.value
             url += '?lt={lt}'.format(lt=log_type)
-        cache_table = self._request(url).find(class_='Table')
+        cache_table = self._request(url, parse_only=PageRegions(classes=["Table"])).find(class_='Table')
         if cache_table is None:  # no logs on the account
             return
         cache_table = cache_table.tbody
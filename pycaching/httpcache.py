@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class CachedResponse(object):
+    """A response stored in :class:`.ResponseCache`."""
+
+    __slots__ = "url", "status_code", "headers", "content", "encoding", "stored"
+
+    def __init__(self, url, status_code, headers, content, encoding, stored):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.encoding = encoding
+        self.stored = stored
+
+    @property
+    def age(self):
+        """Number of seconds since the response was downloaded or revalidated.
+
+        :type: :class:`float`
+        """
+        return time.time() - self.stored
+
+    def validators(self):
+        """Return headers for conditional revalidation of this response.
+
+        :return: Headers to add to the request, empty if the server didn't provide any validators.
+        :rtype: :class:`dict`
+        """
+        headers = {}
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def to_response(self):
+        """Return a :class:`requests.Response` equivalent to the stored one."""
+        res = requests.Response()
+        res.url = self.url
+        res.status_code = self.status_code
+        res.reason = "OK"
+        res.headers = CaseInsensitiveDict(self.headers)
+        res.encoding = self.encoding
+        res._content = self.content
+        return res
+
+
+class ResponseCache(object):
+    """Persistent on-disk cache of HTTP responses, stored in a SQLite database.
+
+    Only successful GET responses of endpoint classes (see :func:`.util.endpoint_class`) with a
+    configured time to live are cached. Responses are keyed by URL, query parameters and the
+    logged in user. When the cache grows over its size limit, the least recently used responses are
+    evicted.
+
+    Pass an instance to :class:`.Geocaching` to enable caching.
+    """
+
+    # {endpoint class: time to live in seconds}
+    default_ttls = {
+        "cache_details": 10 * 60,
+        "print_page": 10 * 60,
+        "logbook": 5 * 60,
+    }
+
+    def __init__(self, filename, *, ttls=None, max_size=100 * 2 ** 20):
+        """Open (or create) a response cache.
+
+        :param str filename: Path to the database file.
+        :param dict ttls: Mapping of endpoint class names to number of seconds their responses
+            are considered fresh. Overrides the :attr:`default_ttls` for given classes. Use
+            :code:`None` as a value to disable caching of a class.
+        :param int max_size: Maximum total size of stored response bodies in bytes.
+        """
+        self.ttls = {k: v for k, v in dict(self.default_ttls, **(ttls or {})).items() if v}
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status_code INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    encoding TEXT,
+                    size INTEGER NOT NULL,
+                    stored REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def close(self):
+        """Close the underlying database."""
+        with self._lock:
+            self._db.close()
+
+    def ttl(self, endpoint):
+        """Return a time to live in seconds for responses of an endpoint class.
+
+        :param str endpoint: Endpoint class name.
+        :return: Time to live or :code:`None` if the endpoint class is not cached.
+        """
+        return self.ttls.get(endpoint)
+
+    @staticmethod
+    def key(url, params=None, username=None):
+        """Return a cache key for a request.
+
+        :param str url: Requested URL.
+        :param dict params: Query parameters.
+        :param str username: Currently logged in user.
+        """
+        params = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        raw = json.dumps([url, params, username])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return a stored response.
+
+        :param str key: Cache key, see :meth:`key`.
+        :return: Stored response or :code:`None` if not found.
+        :rtype: :class:`.CachedResponse`
+        """
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT url, status_code, headers, content, encoding, stored FROM responses WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        url, status_code, headers, content, encoding, stored = row
+        return CachedResponse(url, status_code, json.loads(headers), content, encoding, stored)
+
+    def put(self, key, response):
+        """Store a response and evict old ones if the cache is too large.
+
+        :param str key: Cache key, see :meth:`key`.
+        :param requests.Response response: Response to store.
+        """
+        content = response.content
+        if len(content) > self.max_size:
+            return
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, response.status_code, json.dumps(dict(response.headers)), content,
+                 response.encoding, len(content), now, now))
+            self._evict()
+
+    def refresh(self, key):
+        """Mark a stored response as fresh (eg. after successful revalidation).
+
+        :param str key: Cache key, see :meth:`key`.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("UPDATE responses SET stored = ?, accessed = ? WHERE key = ?", (now, now, key))
+
+    def clear(self):
+        """Remove all stored responses."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+
+    @property
+    def size(self):
+        """Total size of stored response bodies in bytes.
+
+        :type: :class:`int`
+        """
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self):
+        """Remove the least recently used responses until the cache fits into its size limit."""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+        evicted = 0
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_size:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logging.debug("Evicted {} responses from response cache".format(evicted))
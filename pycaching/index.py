@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import heapq
+import logging
+import math
+import geopy.distance
+from pycaching.errors import ValueError as PycachingValueError
+from pycaching.geo import distances
+
+
+class CacheIndex(object):
+    """In-memory spatial index of :class:`.Cache` objects by their locations.
+
+    Caches are kept in buckets of a regular latitude/longitude grid, so that queries look only at
+    caches in nearby grid cells. Caches are identified by their waypoints, adding a cache with the
+    same waypoint again replaces the old one.
+
+    Distances are computed on a sphere, see :func:`.geo.distances`. The grid does not wrap around
+    the 180th meridian.
+    """
+
+    def __init__(self, caches=(), *, cell_size=0.05):
+        """Create an index.
+
+        :param caches: Iterable of caches to add, see :meth:`update`.
+        :param float cell_size: Size of the grid cells in degrees. Cells should contain at most
+            a few dozens of caches.
+        """
+        if cell_size <= 0:
+            raise PycachingValueError("Cell size must be positive.")
+        self.cell_size = cell_size
+        self._cells = {}  # format: { (row, column): { waypoint: <Cache> } }
+        self._caches = {}  # format: { waypoint: (<Cache>, (row, column)) }
+        self.update(caches)
+
+    def __len__(self):
+        return len(self._caches)
+
+    def __iter__(self):
+        return (cache for cache, _ in self._caches.values())
+
+    def __contains__(self, cache):
+        """Return if a cache with the same waypoint is in the index."""
+        return cache.wp in self._caches
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def add(self, cache):
+        """Add a cache to the index.
+
+        :param .Cache cache: Cache to add.
+        :raise .ValueError: If the cache location is not known.
+        """
+        if not hasattr(cache, "_location"):
+            raise PycachingValueError("Location of cache {} is not known.".format(cache.wp))
+        self.remove(cache)
+        cell = self._cell(cache.location.latitude, cache.location.longitude)
+        self._cells.setdefault(cell, {})[cache.wp] = cache
+        self._caches[cache.wp] = cache, cell
+
+    def update(self, caches):
+        """Add many caches to the index.
+
+        Caches with unknown location (e.g. premium only caches found by basic members) are skipped.
+
+        :param caches: Iterable of :class:`.Cache` instances.
+        """
+        skipped = 0
+        for cache in caches:
+            if hasattr(cache, "_location"):
+                self.add(cache)
+            else:
+                skipped += 1
+        if skipped:
+            logging.debug("Skipped {} caches without location".format(skipped))
+
+    def remove(self, cache):
+        """Remove a cache from the index, if it is there.
+
+        :param cache: :class:`.Cache` instance or its waypoint.
+        """
+        wp = getattr(cache, "wp", cache)
+        if wp not in self._caches:
+            return
+        _, cell = self._caches.pop(wp)
+        del self._cells[cell][wp]
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def _caches_between(self, south, west, north, east):
+        """Return caches from all cells overlapping given bounds."""
+        (row_min, col_min), (row_max, col_max) = self._cell(south, west), self._cell(north, east)
+        return self._caches_in_cells(row_min, col_min, row_max, col_max)
+
+    def _caches_in_cells(self, row_min, col_min, row_max, col_max):
+        """Return caches from a range of cells (including the boundary ones)."""
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self._cells):
+            # it is faster to go through all non-empty cells
+            cells = (cache_dict for (row, col), cache_dict in self._cells.items()
+                     if row_min <= row <= row_max and col_min <= col <= col_max)
+        else:
+            cells = (self._cells.get((row, col)) for row in range(row_min, row_max + 1)
+                     for col in range(col_min, col_max + 1))
+        return [cache for cache_dict in cells if cache_dict for cache in cache_dict.values()]
+
+    def in_rect(self, rect):
+        """Return caches inside a rectangle.
+
+        :param .Rectangle rect: Searched area.
+        :rtype: :class:`list` of :class:`.Cache`
+        """
+        (north, west), (south, east) = [(p.latitude, p.longitude) for p in rect.corners]
+        candidates = self._caches_between(south, west, north, east)
+        inside = rect.contains_many(cache.location for cache in candidates)
+        return [cache for cache, is_inside in zip(candidates, inside) if is_inside]
+
+    def in_polygon(self, polygon):
+        """Return caches inside a polygon.
+
+        :param .Polygon polygon: Searched area.
+        :rtype: :class:`list` of :class:`.Cache`
+        """
+        candidates = self.in_rect(polygon.bounding_box)
+        inside = polygon.contains_many(cache.location for cache in candidates)
+        return [cache for cache, is_inside in zip(candidates, inside) if is_inside]
+
+    def within(self, point, radius):
+        """Return caches within a distance from a point, the nearest first.
+
+        :param .Point point: Center of the searched area.
+        :param float radius: Distance in meters.
+        :return: Pairs of (cache, distance in meters).
+        :rtype: :class:`list` of :class:`tuple`
+        """
+        d_lat = math.degrees(radius / (geopy.distance.EARTH_RADIUS * 1000))
+        cos_lat = math.cos(math.radians(min(89.9, abs(point.latitude) + d_lat)))
+        d_lon = min(180, d_lat / cos_lat)
+        candidates = self._caches_between(point.latitude - d_lat, point.longitude - d_lon,
+                                          point.latitude + d_lat, point.longitude + d_lon)
+        found = [(cache, distance) for cache, distance in
+                 zip(candidates, distances(point, [cache.location for cache in candidates]))
+                 if distance <= radius]
+        return sorted(found, key=lambda pair: pair[1])
+
+    def nearest(self, point, k=1):
+        """Return k caches nearest to a point, the nearest first.
+
+        :param .Point point: Point to measure from.
+        :param int k: Number of caches to return.
+        :return: Pairs of (cache, distance in meters).
+        :rtype: :class:`list` of :class:`tuple`
+        """
+        if k < 1 or not self._caches:
+            return []
+
+        # grow a square around the point until it contains k caches
+        row, col = self._cell(point.latitude, point.longitude)
+        rows = [r for r, _ in self._cells]
+        cols = [c for _, c in self._cells]
+        max_ring = max(abs(row - min(rows)), abs(row - max(rows)), abs(col - min(cols)), abs(col - max(cols)))
+        for ring in range(max_ring + 1):
+            candidates = self._caches_in_cells(row - ring, col - ring, row + ring, col + ring)
+            if len(candidates) >= k:
+                break
+
+        # the k-th nearest candidate limits the distance, but closer caches can lie outside the square
+        found = zip(candidates, distances(point, [cache.location for cache in candidates]))
+        radius = heapq.nsmallest(k, found, key=lambda pair: pair[1])[-1][1]
+        return self.within(point, radius)[:k]
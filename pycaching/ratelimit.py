@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import logging
+import threading
+import time
+from pycaching.errors import ValueError as PycachingValueError
+
+
+class TokenBucket(object):
+    """Paces requests of one endpoint class using a token bucket algorithm.
+
+    The bucket holds at most :code:`capacity` tokens and is refilled by :code:`rate` tokens per
+    second. Each request takes one token and if there is none left, the caller waits. The waiting
+    is reserved under a lock, so concurrent callers are spread evenly in time. The rate is halved
+    when the server refuses a request and recovers towards the configured :code:`max_rate` with
+    the following accepted requests.
+    """
+
+    # lower bound for the rate, so the bucket never stalls completely after many rate limit errors
+    min_rate = 0.01
+
+    # factor of the rate increase after each accepted request, until the configured rate is reached
+    recovery = 1.1
+
+    def __init__(self, rate, capacity=1):
+        """Create a full bucket.
+
+        :param float rate: Number of requests per second allowed in the long term.
+        :param int capacity: Number of requests which can be done at once (burst size).
+        """
+        if rate <= 0 or capacity < 1:
+            raise PycachingValueError("Rate must be positive and capacity at least 1.")
+        self.rate = self.max_rate = float(rate)
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0
+        self._window_rate = None  # rate derived from rate limit headers, valid until _window_end
+        self._window_end = 0
+        self._lock = threading.Lock()
+
+    def _current_rate(self, now):
+        if self._window_rate is not None and now < self._window_end:
+            return min(self.rate, self._window_rate)
+        return self.rate
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._current_rate(now))
+            self._updated = now
+
+    def acquire(self):
+        """Take one token, wait until it is available if needed.
+
+        :return: Number of seconds spent waiting.
+        :rtype: :class:`float`
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            delay = max(0, self._blocked_until - now)
+            if self._tokens < 0:
+                delay = max(delay, -self._tokens / self._current_rate(now))
+        if delay > 0:
+            logging.debug("Rate limiting: waiting {:.2f} s".format(delay))
+            time.sleep(delay)
+        return delay
+
+    def update(self, remaining=None, reset=None, limited=False):
+        """Adapt the bucket to the rate limit state reported by the server.
+
+        :param int remaining: Number of requests remaining in current rate limit window.
+        :param int reset: Number of seconds until current rate limit window resets.
+        :param bool limited: Whether the server has just refused a request because of rate limit.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if limited:
+                # too fast - slow down for the future and pause until the window resets, but only
+                # once per window, as more concurrent requests may be refused at the same time
+                if now >= self._blocked_until:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    logging.info("Rate limit reached, lowering the rate to {:.3f} requests/s".format(self.rate))
+                self._tokens = min(self._tokens, 0)
+                remaining = 0
+                if reset is None:
+                    self._blocked_until = max(self._blocked_until, now + 1 / self.rate)
+            elif self.rate < self.max_rate and now >= self._blocked_until:
+                self.rate = min(self.max_rate, self.rate * self.recovery)
+
+            if reset is None:
+                return
+
+            if remaining is not None and remaining <= 0:
+                self._blocked_until = max(self._blocked_until, now + reset)
+                self._window_rate = None
+            elif remaining is not None and reset > 0:
+                # spread remaining requests evenly over the rest of the window
+                self._window_rate = remaining / reset
+                self._window_end = now + reset
+                self._tokens = min(self._tokens, remaining)
+
+
+class RateLimiter(object):
+    """Paces requests to geocaching.com by endpoint classes, see :func:`.util.endpoint_class`.
+
+    Each endpoint class has its own :class:`.TokenBucket`. Requests to classes without a configured
+    limit are not paced. The buckets also learn from the :code:`x-rate-limit-*` headers and from
+    rate limit errors returned by the server.
+
+    Pass an instance to :class:`.Geocaching` to enable rate limiting. One instance can be shared by
+    more :class:`.Geocaching` instances, if they should share the limits.
+    """
+
+    # {endpoint class: (requests per second, burst size)}
+    default_limits = {
+        "api_search": (0.25, 10),
+        "cache_details": (1, 5),
+        "print_page": (1, 5),
+        "logbook": (1, 5),
+        "tiles": (4, 10),
+    }
+
+    def __init__(self, limits=None):
+        """Create a rate limiter.
+
+        :param dict limits: Mapping of endpoint class names to tuples of (requests per second,
+            burst size). Overrides the :attr:`default_limits` for given classes. Use :code:`None`
+            as a value to disable pacing of a class.
+        """
+        limits = dict(self.default_limits, **(limits or {}))
+        self._buckets = {name: TokenBucket(*limit) for name, limit in limits.items() if limit is not None}
+
+    def __getitem__(self, endpoint):
+        """Return a :class:`.TokenBucket` for endpoint class.
+
+        :raise KeyError: If the endpoint class is not limited.
+        """
+        return self._buckets[endpoint]
+
+    def acquire(self, endpoint):
+        """Wait until a request to the endpoint class can be done.
+
+        :param str endpoint: Endpoint class name.
+        :return: Number of seconds spent waiting.
+        """
+        bucket = self._buckets.get(endpoint)
+        return bucket.acquire() if bucket else 0
+
+    def update(self, endpoint, headers, limited=False):
+        """Update the limits of endpoint class from response headers.
+
+        :param str endpoint: Endpoint class name.
+        :param headers: Response headers.
+        :param bool limited: Whether the response reports exceeded rate limit.
+        """
+        bucket = self._buckets.get(endpoint)
+        if not bucket:
+            return
+
+        def header(name):
+            try:
+                return int(headers.get("x-rate-limit-{}".format(name)))
+            except (TypeError, ValueError):
+                return None
+
+        bucket.update(header("remaining"), header("reset"), limited=limited)
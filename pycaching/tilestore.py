@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+
+class StoredTile(object):
+    """A UTFGrid stored in :class:`.TileStore`, together with statistics of its download."""
+
+    __slots__ = "x", "y", "z", "grid", "status_code", "size", "elapsed", "png_needed", "downloaded"
+
+    def __init__(self, x, y, z, grid, status_code, size, elapsed, png_needed, downloaded):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.grid = grid
+        self.status_code = status_code
+        self.size = size
+        self.elapsed = elapsed
+        self.png_needed = png_needed
+        self.downloaded = downloaded
+
+    @property
+    def age(self):
+        """Number of seconds since the tile was downloaded.
+
+        :type: :class:`float`
+        """
+        return time.time() - self.downloaded
+
+
+class TileStore(object):
+    """Persistent on-disk store of UTFGrid map tiles, stored in a SQLite database.
+
+    Tiles are keyed by their coordinates. Besides the grid itself, the store records when the tile
+    was downloaded, the received status code, content length, time spent on the request and whether
+    the .png tile had to be downloaded first. Fresh tiles are then served from the store and stale
+    ones are downloaded again, without the .png warm-up if it was not needed last time. When the
+    store grows over its size limit, the least recently used tiles are evicted.
+
+    Pass an instance to :class:`.Geocaching` to enable storing the tiles.
+    """
+
+    # size counted for each tile besides its grid, so that also the empty tiles are evicted
+    row_size = 64
+
+    def __init__(self, filename, *, max_age=60 * 60, max_size=100 * 2 ** 20):
+        """Open (or create) a tile store.
+
+        :param str filename: Path to the database file.
+        :param float max_age: Number of seconds a stored tile is considered fresh. Use :code:`None`
+            to never download stored tiles again.
+        :param int max_size: Maximum total size of stored tiles in bytes, see :attr:`size`.
+        """
+        self.max_age = max_age
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS tiles (
+                    x INTEGER NOT NULL,
+                    y INTEGER NOT NULL,
+                    z INTEGER NOT NULL,
+                    grid TEXT,
+                    status_code INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    elapsed REAL,
+                    png_needed INTEGER NOT NULL,
+                    downloaded REAL NOT NULL,
+                    accessed REAL NOT NULL,
+                    PRIMARY KEY (x, y, z)
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS tiles_accessed ON tiles (accessed)")
+
+    def close(self):
+        """Close the underlying database."""
+        with self._lock:
+            self._db.close()
+
+    def is_fresh(self, tile):
+        """Return whether a stored tile can be used without downloading it again.
+
+        :param .StoredTile tile: Stored tile.
+        """
+        return self.max_age is None or tile.age < self.max_age
+
+    def get(self, x, y, z):
+        """Return a stored tile.
+
+        :param int x: Map tile X coordinate.
+        :param int y: Map tile Y coordinate.
+        :param int z: Map tile Z coordinate.
+        :return: Stored tile or :code:`None` if not found.
+        :rtype: :class:`.StoredTile`
+        """
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT grid, status_code, size, elapsed, png_needed, downloaded FROM tiles "
+                "WHERE x = ? AND y = ? AND z = ?", (x, y, z)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE tiles SET accessed = ? WHERE x = ? AND y = ? AND z = ?",
+                             (time.time(), x, y, z))
+        grid, status_code, size, elapsed, png_needed, downloaded = row
+        grid = json.loads(grid) if grid is not None else None
+        return StoredTile(x, y, z, grid, status_code, size, elapsed, bool(png_needed), downloaded)
+
+    def put(self, x, y, z, grid, *, status_code, size, elapsed=None, png_needed=False):
+        """Store a downloaded tile and evict old ones if the store is too large.
+
+        :param int x: Map tile X coordinate.
+        :param int y: Map tile Y coordinate.
+        :param int z: Map tile Z coordinate.
+        :param dict grid: Downloaded UTFGrid, :code:`None` for tiles without any content.
+        :param int status_code: Status code of the UTFGrid response.
+        :param int size: Content length of the UTFGrid response.
+        :param float elapsed: Number of seconds spent on the UTFGrid request.
+        :param bool png_needed: Whether the .png tile had to be downloaded first.
+        """
+        raw = json.dumps(grid) if grid is not None else None
+        if len(raw or "") + self.row_size > self.max_size:
+            return
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (x, y, z, raw, status_code, size, elapsed, int(png_needed), now, now))
+            self._evict()
+
+    def clear(self):
+        """Remove all stored tiles."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM tiles")
+
+    @property
+    def size(self):
+        """Total size of stored tiles in bytes, their grids plus :attr:`row_size` for each of them.
+
+        :type: :class:`int`
+        """
+        with self._lock:
+            return self._total_size()
+
+    def _total_size(self):
+        return self._db.execute("SELECT COALESCE(SUM(LENGTH(grid)), 0) + COUNT(*) * ? FROM tiles",
+                                (self.row_size,)).fetchone()[0]
+
+    def _evict(self):
+        """Remove the least recently used tiles until the store fits into its size limit."""
+        total = self._total_size()
+        if total <= self.max_size:
+            return
+        evicted = 0
+        rows = self._db.execute("SELECT x, y, z, COALESCE(LENGTH(grid), 0) + ? FROM tiles ORDER BY accessed",
+                                (self.row_size,)).fetchall()
+        for x, y, z, size in rows:
+            if total <= self.max_size:
+                break
+            self._db.execute("DELETE FROM tiles WHERE x = ? AND y = ? AND z = ?", (x, y, z))
+            total -= size
+            evicted += 1
+        logging.debug("Evicted {} tiles from tile store".format(evicted))
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
+import re
 from pycaching import errors
-from pycaching.util import lazy_loaded, format_date
+from pycaching.util import lazy_loaded, format_date, parse_html, PageRegions, search_source
 
 # prefix _type() function to avoid collisions with trackable type
 _type = type
@@ -10,6 +11,15 @@ _type = type
 class Trackable(object):
     """Represents a trackable with its properties."""
 
+    # parts of the details page used by load(), the rest is not parsed at all
+    _details_regions = PageRegions(
+        ids=["ctl00_ContentBody_lbHeading", "ctl00_ContentBody_BugTypeImage", "ctl00_ContentBody_BugDetails_BugOwner",
+             "ctl00_ContentBody_BugDetails_BugLocation", "TrackableGoal", "TrackableDetails",
+             "ctl00_ContentBody_lnkGoogleKML", "ctl00_ContentBody_LogLink"])
+
+    # trackable ID is taken directly from the page source, see util.search_source()
+    _tid_pattern = re.compile(r"class=\"CoordInfoCode\">([^<]+)<")
+
     def __init__(self, geocaching, tid, *, name=None, location=None, owner=None,
                  type=None, description=None, goal=None, url=None):
         self.geocaching = geocaching
@@ -180,26 +190,47 @@ class Trackable(object):
             raise errors.LoadError("Trackable lacks info for loading")
 
         # make request
-        root = self.geocaching._request(url)
+        source = self.geocaching._request(url, expect="raw").text
+        for name, value in self.geocaching._parse(self._parse_details_page, source).items():
+            setattr(self, name, value)
+
+    @staticmethod
+    def _parse_details_page(source, parser):
+        """Return trackable properties parsed from a trackable details page.
+
+        A pure function of the page source, so it can be run in another process.
+
+        :param str source: Page source.
+        :param str parser: BeautifulSoup HTML parser to use.
+        :return: Mapping of trackable property names to their values.
+        :rtype: :class:`dict`
+        """
+        root = parse_html(source, parser, parse_only=Trackable._details_regions)
+        data = {}
 
         # parse data
-        self.tid = root.find("span", "CoordInfoCode").text
-        self.name = root.find(id="ctl00_ContentBody_lbHeading").text
-        self.type = root.find(id="ctl00_ContentBody_BugTypeImage").get("alt")
-        self.owner = root.find(id="ctl00_ContentBody_BugDetails_BugOwner").text
-        self.goal = root.find(id="TrackableGoal").text
-        self.description = root.find(id="TrackableDetails").text
-        self._kml_url = root.find(id="ctl00_ContentBody_lnkGoogleKML").get("href")
+        tid = search_source(Trackable._tid_pattern, source)
+        if not tid:
+            raise errors.LoadError("Cannot find ID of the trackable")
+        data["tid"] = tid
+        data["name"] = root.find(id="ctl00_ContentBody_lbHeading").text
+        data["type"] = root.find(id="ctl00_ContentBody_BugTypeImage").get("alt")
+        data["owner"] = root.find(id="ctl00_ContentBody_BugDetails_BugOwner").text
+        data["goal"] = root.find(id="TrackableGoal").text
+        data["description"] = root.find(id="TrackableDetails").text
+        data["_kml_url"] = root.find(id="ctl00_ContentBody_lnkGoogleKML").get("href")
 
         # another Groundspeak trick... inconsistent relative / absolute URL on one page
-        self._log_page_url = "/track/" + root.find(id="ctl00_ContentBody_LogLink")["href"]
+        data["_log_page_url"] = "/track/" + root.find(id="ctl00_ContentBody_LogLink")["href"]
 
         location_raw = root.find(id="ctl00_ContentBody_BugDetails_BugLocation")
         location_url = location_raw.get("href", "")
         if "cache_details" in location_url:
-            self.location = location_url
+            data["location"] = location_url
         else:
-            self.location = location_raw.text
+            data["location"] = location_raw.text
+
+        return data
 
     def _load_log_page(self):
         """Load a logging page for this trackable.
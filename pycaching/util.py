@@ -1,14 +1,26 @@
 #!/usr/bin/env python3
 
+import html
 import logging
 import platform
 import re
 import warnings
 import inspect
 import functools
+import itertools
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from bs4 import BeautifulSoup, SoupStrainer
 from pycaching import errors
 
+try:
+    from bs4.filter import ElementFilter  # BeautifulSoup >= 4.13
+except ImportError:
+    ElementFilter = None
+
 
 _rot13codeTable = str.maketrans(
     "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
@@ -17,6 +29,17 @@ _rot13codeTable = str.maketrans(
 
 _attributes_url = "https://www.geocaching.com/app/src/assets/sprites/attributes.svg"
 
+# {URL fragment: endpoint class}, first match wins
+_endpoint_classes = (
+    ("api/proxy/web/search", "api_search"),
+    ("seek/cache_details.aspx", "cache_details"),
+    ("/geocache/GC", "cache_details"),
+    ("seek/cdpf.aspx", "print_page"),
+    ("seek/geocache.logbook", "logbook"),
+    ("tiles01.geocaching.com", "tiles"),
+    ("play/search", "search"),
+)
+
 
 def lazy_loaded(func):
     """Decorator providing lazy loading."""
@@ -26,6 +49,12 @@ def lazy_loaded(func):
         try:
             return func(*args, **kwargs)
         except AttributeError:
+            load_stored = getattr(self, "_load_stored", None)
+            if load_stored is not None and load_stored():
+                try:
+                    return func(*args, **kwargs)
+                except AttributeError:
+                    pass  # not stored, load it
             logging.debug("Lazy loading {} into <object {} id {}>".format(
                 func.__name__, type(self), id(self)))
             self.load()
@@ -94,8 +123,209 @@ def format_date(date, user_date_format):
     return date.strftime(date_format)
 
 
-def get_possible_attributes(*, session=None):
-    """Return a dict of all possible attributes parsed from Groundspeak's website."""
+def default_html_parser():
+    """Return a name of the fastest HTML parser available for BeautifulSoup.
+
+    Use :code:`lxml` if it is installed, otherwise fall back to built-in :code:`html.parser`.
+
+    :rtype: :class:`str`
+    """
+    try:
+        import lxml  # NOQA
+    except ImportError:
+        return "html.parser"
+    return "lxml"
+
+
+def parse_html(markup, parser, parse_only=None):
+    """Return a :class:`bs4.BeautifulSoup` object of a page.
+
+    Line breaks are normalized to LF first, as browsers do. Otherwise :code:`lxml` converts them
+    while :code:`html.parser` keeps CRLF, and texts extracted by different parsers would differ.
+
+    :param str markup: HTML to parse.
+    :param str parser: BeautifulSoup HTML parser to use.
+    :param .PageRegions parse_only: Parts of the page to parse. If :code:`None`, the whole page is
+        parsed.
+    """
+    markup = markup.replace("\r\n", "\n").replace("\r", "\n")
+    return BeautifulSoup(markup, parser, parse_only=parse_only)
+
+
+class PageRegions(ElementFilter or SoupStrainer):
+    """Restricts HTML parsing to the regions of a page which are really used.
+
+    Pass an instance as :code:`parse_only` to :meth:`.Geocaching._request`. Only elements matching
+    some of the tag names, ids or classes (together with all their descendants) are then built
+    into the resulting tree, the rest of the page is skipped. Not supported by :code:`html5lib`.
+
+    Since BeautifulSoup 4.13, this is an :class:`bs4.filter.ElementFilter` overriding its tag and
+    string creation hooks. Before, it is a :class:`bs4.SoupStrainer` with a function matching
+    the tag names and attributes.
+    """
+
+    def __init__(self, *, names=(), ids=(), classes=()):
+        """Create a set of page regions.
+
+        :param names: Tag names of the regions (e.g. :code:`title`).
+        :param ids: Element ids of the regions.
+        :param classes: CSS classes of the regions.
+        """
+        if ElementFilter is None:
+            # a function passed as the name gets the tag name and attributes during parsing
+            super().__init__(name=lambda name, attrs: self.matches(name, attrs or {}))
+        else:
+            super().__init__()
+        self.names = frozenset(names)
+        self.ids = frozenset(ids)
+        self.classes = frozenset(classes)
+
+    def __repr__(self):
+        return "<PageRegions names={} ids={} classes={}>".format(
+            sorted(self.names), sorted(self.ids), sorted(self.classes))
+
+    def matches(self, name, attrs):
+        """Return whether an element starts one of the regions.
+
+        :param str name: Tag name.
+        :param dict attrs: Raw tag attributes.
+        """
+        if name in self.names or (attrs.get("id") in self.ids):
+            return True
+        classes = attrs.get("class") or ()
+        if isinstance(classes, str):
+            classes = classes.split()
+        return not self.classes.isdisjoint(classes)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.matches(name, attrs or {})
+
+    def allow_string_creation(self, string):
+        return False
+
+
+def search_source(pattern, source):
+    """Return a text found in a page source by a regular expression.
+
+    Used for simple fields which are easy to locate in raw HTML, so that their elements don't have
+    to be parsed into a tree.
+
+    :param pattern: Compiled regular expression with one group.
+    :param str source: Page source.
+    :return: Text of the group with HTML entities decoded and whitespace stripped, or :code:`None`
+        if the pattern is not found.
+    """
+    match = pattern.search(source)
+    return html.unescape(match.group(1)).strip() if match else None
+
+
+def endpoint_class(url):
+    """Return a name of geocaching.com endpoint class the URL belongs to.
+
+    Endpoint classes group URLs which are served (and rate limited) the same way, eg.
+    :code:`cache_details` for both cache details page URL variants.
+
+    :param str url: Requested URL.
+    :return: Endpoint class name or :code:`None` for unknown URLs.
+    :rtype: :class:`str`
+    """
+    for fragment, name in _endpoint_classes:
+        if fragment in url:
+            return name
+    return None
+
+
+def parallel_map(func, iterable, *, workers, ordered=True):
+    """Return a generator of :code:`func` results applied on items of :code:`iterable` in threads.
+
+    At most :code:`workers` items are processed at the same time and the :code:`iterable` is
+    consumed lazily, so it can be very long or even infinite. When the generator is closed before
+    it is exhausted, items which were not started yet are cancelled.
+
+    :param callable func: Function to call on each item.
+    :param iterable: Items to process.
+    :param int workers: Maximum number of items processed at once.
+    :param bool ordered: Whether to yield results in the same order as the items, or as soon as
+        they are ready.
+    """
+    if workers < 1:
+        raise errors.ValueError("Number of workers must be positive.")
+
+    iterator = iter(iterable)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(func, item) for item in itertools.islice(iterator, workers))
+        try:
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+
+                for future in done:
+                    # refill the pool before yielding, so the workers are not idle meanwhile
+                    for item in itertools.islice(iterator, 1):
+                        pending.append(executor.submit(func, item))
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def read_ahead(iterable, depth):
+    """Return a generator of items of :code:`iterable`, which is consumed in a background thread.
+
+    The thread stays at most :code:`depth` items ahead of the consumer, so that slow producing
+    (e.g. downloading) of the next items overlaps with processing of the current one. Exceptions
+    raised by the :code:`iterable` are re-raised to the consumer. When the generator is closed,
+    the thread stops after finishing the item it is producing.
+
+    :param iterable: Items to produce.
+    :param int depth: Maximum number of items produced ahead.
+    """
+    if depth < 1:
+        raise errors.ValueError("Read ahead depth must be positive.")
+
+    items = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    end = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put((item, None))
+                if stopped.is_set():
+                    return
+            items.put((end, None))
+        except BaseException as e:  # the consumer would wait forever for any uncaught one
+            items.put((end, e))
+
+    threading.Thread(target=produce, name="read_ahead", daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is end:
+                return
+            yield item
+    finally:
+        stopped.set()
+        # unblock the producer, so it can put its last item and notice it should stop
+        while True:
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                break
+
+
+def get_possible_attributes(*, session=None, parser=None):
+    """Return a dict of all possible attributes parsed from Groundspeak's website.
+
+    :param requests.Session session: Session to use for the request.
+    :param str parser: BeautifulSoup HTML parser to use, see :func:`default_html_parser`.
+    """
     # imports are here to not slow down other parts of program which normally don't use this method
     import requests
     from bs4 import BeautifulSoup
@@ -103,7 +333,7 @@ def get_possible_attributes(*, session=None):
     session = session or requests.Session()
 
     try:
-        page = BeautifulSoup(session.get(_attributes_url).text, "html.parser")
+        page = BeautifulSoup(session.get(_attributes_url).text, parser or default_html_parser())
     except requests.exceptions.ConnectionError as e:
         raise errors.Error("Cannot load attributes page.") from e
 
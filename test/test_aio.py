@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import asyncio
+import unittest
+
+from pycaching import Point, Rectangle
+from pycaching.aio import AsyncGeocaching
+from pycaching.cache import Cache
+from pycaching.errors import ValueError as PycachingValueError
+from pycaching.geocaching import Geocaching
+from . import NetworkedTest
+
+
+class TestProperties(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.agc = AsyncGeocaching(Geocaching())
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.agc.close())
+        self.loop.close()
+
+    def test_ensure_pool_size(self):
+        self.agc._ensure_pool_size()
+        adapter = self.agc.geocaching._session.get_adapter("https://www.geocaching.com")
+        self.assertEqual(adapter._pool_maxsize, 10)
+
+    def test_load_cache(self):
+        with self.assertRaises(PycachingValueError):
+            self.loop.run_until_complete(self.agc.load_cache(Cache(self.agc.geocaching, "GC4808G"), "xxx"))
+
+    def test_iterate(self):
+        async def collect():
+            return [i async for i in self.agc._iterate(range(5))]
+
+        self.assertEqual(self.loop.run_until_complete(collect()), list(range(5)))
+
+
+class TestMethods(NetworkedTest):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.new_event_loop()
+        self.agc = AsyncGeocaching(self.gc)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.agc.close())
+        self.loop.close()
+
+    def test_get_cache(self):
+        with self.recorder.use_cassette('geocaching_shortcut_getcache'):
+            cache = self.loop.run_until_complete(self.agc.get_cache("GC4808G"))
+        self.assertEqual("Nekonecne ticho", cache.name)
+
+    def test_get_trackable(self):
+        with self.recorder.use_cassette('geocaching_shortcut_gettrackable'):
+            trackable = self.loop.run_until_complete(self.agc.get_trackable("TB1KEZ9"))
+        self.assertEqual("Lilagul #2: SwedenHawk Geocoin", trackable.name)
+
+    def test_search_rect(self):
+        rect = Rectangle(Point(49.73, 13.38), Point(49.74, 13.39))
+        expected = {'GC1TYYG', 'GC11PRW', 'GC7JRR5', 'GC161KR', 'GC1GW54', 'GC7KDWE', 'GC8D303'}
+
+        async def collect():
+            return {cache.wp async for cache in self.agc.search_rect(rect)}
+
+        with self.recorder.use_cassette('geocaching_search_rect'):
+            self.assertSetEqual(self.loop.run_until_complete(collect()), expected)
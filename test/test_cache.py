@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import itertools
+import time
 import unittest
 from datetime import date
 from unittest import mock
@@ -8,7 +10,7 @@ from pycaching.errors import ValueError as PycachingValueError, LoadError, PMOnl
 from pycaching.geo import Point
 from pycaching.geocaching import Geocaching
 from pycaching.log import Log, Type as LogType
-from pycaching.util import parse_date
+from pycaching.util import parse_date, search_source
 from . import NetworkedTest
 
 
@@ -98,6 +100,25 @@ class TestProperties(unittest.TestCase):
     def test_found(self):
         self.assertEqual(self.c.found, False)
 
+    def test_source_patterns(self):
+        source = """<title>
+            GC4808G Nekonecne ticho (Unknown Cache)</title>
+            <span id="uxLatLon" class="myLatLon">N 49&#176; 43.850 E 013&#176; 22.905</span>
+            <script>var userToken = null, other = 'x';
+            userToken = 'ABC123';
+            var userDefinedCoords = {"status":"success","data":{"isUserDefined":true,
+            "oldLatLng":[49.73083,13.38175],"oldLatLngDisplay":"N 49° 43.850' E 013° 22.905'"}};</script>"""
+        expected = {
+            "wp": "GC4808G",
+            "location": "N 49° 43.850 E 013° 22.905",
+            "logbook_token": "ABC123",
+            "original_location": "49.73083,13.38175",
+            "print_page_location": None,
+        }
+        for name, value in expected.items():
+            with self.subTest(name):
+                self.assertEqual(search_source(Cache._source_patterns[name], source), value)
+
     def test_size(self):
         self.assertEqual(self.c.size, Size.micro)
 
@@ -173,6 +194,15 @@ class TestProperties(unittest.TestCase):
     def test_pm_only(self):
         self.assertEqual(self.c.pm_only, False)
 
+    def test_last_found(self):
+        self.assertIsNone(self.c.last_found)
+        self.c.last_found = "2020-06-10"
+        self.assertEqual(self.c.last_found, date(2020, 6, 10))
+
+        with self.subTest("filter invalid"):
+            with self.assertRaises(PycachingValueError):
+                self.c.last_found = 20200610
+
 
 class TestMethods(NetworkedTest):
     @classmethod
@@ -307,6 +337,45 @@ class TestMethods(NetworkedTest):
             for expected_log in expected_logs:
                 self.assertIn(expected_log, logs)
 
+    def test_load_logbook_concurrency(self):
+        cache = Cache(self.gc, "GC12345", log_counts={LogType.found_it: 200, LogType.note: 50})
+        cache._logbook_token = "ABC123"
+        total = 250
+
+        def fake_get_page(page, per_page):
+            # later pages are returned sooner
+            time.sleep((5 - page) / 200)
+            return [{"LogGuid": str(i), "LogTypeImage": "2.png", "LogText": "", "Visited": "2020-01-01",
+                     "UserName": "user"} for i in range(page * per_page, min((page + 1) * per_page, total))]
+
+        with mock.patch.object(Cache, "_logbook_get_page", side_effect=fake_get_page) as get_page:
+            with self.subTest("whole logbook"):
+                logs = [log.uuid for log in cache.load_logbook(concurrency=4)]
+                self.assertEqual(logs, [str(i) for i in range(total)])
+                self.assertEqual(sorted(c[0][0] for c in get_page.call_args_list), [0, 1, 2, 3])
+
+            with self.subTest("more logs than estimated"):
+                get_page.reset_mock()
+                total = 320
+                logs = [log.uuid for log in cache.load_logbook(concurrency=4)]
+                self.assertEqual(logs, [str(i) for i in range(total)])
+                self.assertEqual(get_page.call_count, 5)
+
+            with self.subTest("limit"):
+                get_page.reset_mock()
+                logs = [log.uuid for log in cache.load_logbook(limit=120, concurrency=4)]
+                self.assertEqual(logs, [str(i) for i in range(120)])
+                self.assertEqual(sorted(c[0][0] for c in get_page.call_args_list), [0, 1])
+                self.assertEqual(get_page.call_args[0][1], 100)
+
+            with self.subTest("closed early"):
+                get_page.reset_mock()
+                cache.log_counts = {LogType.found_it: 10000}
+                logs = cache.load_logbook(concurrency=2)
+                self.assertEqual(len(list(itertools.islice(logs, 10))), 10)
+                logs.close()
+                self.assertLessEqual(get_page.call_count, 3)
+
     def test_load_log_page(self):
         expected_types = {t.value for t in (LogType.found_it, LogType.didnt_find_it, LogType.note)}
 
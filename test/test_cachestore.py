@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+import datetime
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from pycaching import Cache, Geocaching, Point
+from pycaching.cache import Type, Size, Waypoint
+from pycaching.cachestore import CacheStore
+from pycaching.log import Type as LogType
+from . import NetworkedTest
+
+GUID = "15ad3a3d-92c1-4f7c-b273-60937bcc2072"
+
+
+class TestCacheStore(unittest.TestCase):
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+        self.store = CacheStore(self.filename, max_age=60)
+        self.gc = Geocaching(cache_store=self.store)
+        self.cache = Cache(self.gc, "GC12345", name="Name", location=Point(49.5, 13.25), type=Type.traditional,
+                           state=True, found=True, size=Size.micro, difficulty=1.5, terrain=2,
+                           author="Author", hidden=datetime.date(2010, 1, 2), attributes={"wheelchair": False},
+                           summary="Summary", description="Description", hint="Hint", favorites=5,
+                           log_counts={LogType.found_it: 10}, pm_only=False, guid=GUID,
+                           waypoints={"P1": Waypoint("P1", "Parking", Point(49.6, 13.3), "Note")})
+
+    def tearDown(self):
+        self.store.close()
+        os.remove(self.filename)
+
+    def test_put_get(self):
+        with self.subTest("not stored"):
+            self.assertEqual(self.store.get("GC12345"), {})
+            self.assertEqual(len(self.store), 0)
+
+        with self.subTest("round trip"):
+            self.store.put(self.cache)
+            stored = Cache(self.gc, "GC12345")
+            self.assertTrue(self.store.fill(stored))
+            for name in "name", "location", "type", "state", "size", "difficulty", "terrain", "author", \
+                    "hidden", "attributes", "summary", "description", "hint", "favorites", "log_counts", \
+                    "pm_only", "guid":
+                self.assertEqual(getattr(stored, name), getattr(self.cache, name), name)
+            self.assertEqual(stored.waypoints["P1"].location, Point(49.6, 13.3))
+            self.assertEqual(len(self.store), 1)
+
+        with self.subTest("filled properties are kept"):
+            stored = Cache(self.gc, "GC12345", name="Other")
+            self.store.fill(stored)
+            self.assertEqual(stored.name, "Other")
+
+        with self.subTest("persistent"):
+            self.store.close()
+            self.store = CacheStore(self.filename)
+            self.assertEqual(self.store.get("GC12345")["name"][0], "Name")
+
+        with self.subTest("find by GUID"):
+            self.assertEqual(self.store.find_wp(GUID), "GC12345")
+            self.assertIsNone(self.store.find_wp("00000000-0000-0000-0000-000000000000"))
+
+        with self.subTest("remove"):
+            self.store.remove("GC12345")
+            self.assertEqual(len(self.store), 0)
+
+    def test_field_timestamps(self):
+        with mock.patch("pycaching.cachestore.time.time", return_value=1000):
+            self.store.put(self.cache)
+        with mock.patch("pycaching.cachestore.time.time", return_value=1050):
+            self.store.put(Cache(self.gc, "GC12345", name="New name", favorites=6), ["name", "favorites", "hint"])
+            self.assertEqual(set(self.store.get("GC12345")), set(self.store.get("GC12345", max_age=100)))
+
+        with mock.patch("pycaching.cachestore.time.time", return_value=1100):
+            fresh = self.store.get("GC12345")
+            self.assertEqual(set(fresh), {"name", "favorites"})
+            self.assertEqual(fresh["name"], ("New name", 1050))
+
+            self.store.max_age = None
+            self.assertEqual(self.store.get("GC12345")["hint"], ("Hint", 1000))
+
+        with self.subTest("changed values"):
+            self.assertEqual(self.store.changed_since("GC12345", 1050), {"name", "favorites"})
+            self.assertEqual(self.store.changed_since("GC12345", 1050, ["name", "hint"]), {"name"})
+            self.assertIn("hint", self.store.changed_since("GC12345", 1000))
+            with mock.patch("pycaching.cachestore.time.time", return_value=1200):
+                self.store.put(Cache(self.gc, "GC12345", name="New name", favorites=7))
+            self.assertEqual(self.store.changed_since("GC12345", 1100), {"favorites"})
+            self.assertEqual(self.store.get("GC12345")["name"], ("New name", 1200))
+
+    def test_field_timestamps_without_upsert(self):
+        with mock.patch.object(CacheStore, "_upsert", False):
+            self.test_field_timestamps()
+
+    def test_user_properties(self):
+        self.cache.did_not_find = True
+        self.store.put(self.cache)
+        self.store.put(self.cache, ["found", "_found_status", "did_not_find"])
+
+        self.cache._logbook_token = "ABC123"
+        self.store.put(self.cache, ["_logbook_token"])
+        stored = self.store.get("GC12345")
+        self.assertFalse({"found", "did_not_find", "has_log_draft", "_logbook_token"} & stored.keys())
+
+    def test_setters(self):
+        self.store.put(Cache(self.gc, "GC12345", attributes={"wheelchair": False}))
+        with self.store._db:
+            self.store._db.execute("UPDATE properties SET value = '{\"xxx\": true}' WHERE name = 'attributes'")
+        stored = Cache(self.gc, "GC12345")
+        with self.assertLogs(level="WARNING"):
+            self.store.fill(stored)
+        self.assertEqual(stored.attributes, {})
+
+
+class TestWriteThrough(unittest.TestCase):
+    record = {
+        "code": "GC12345", "name": "Name", "geocacheType": 2, "cacheStatus": 0, "userFound": False,
+        "containerType": 2, "difficulty": 1.5, "terrain": 2, "owner": {"username": "Author"},
+        "placedDate": "2010-01-02T00:00:00", "favoritePoints": 5, "premiumOnly": False,
+        "postedCoordinates": {"latitude": 49.5, "longitude": 13.25}, "id": 123, "userDidNotFind": True,
+        "hasLogDraft": False, "lastFoundDate": "2020-06-10T17:30:00",
+    }
+
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+        self.store = CacheStore(self.filename)
+        self.gc = Geocaching(cache_store=self.store)
+
+    def tearDown(self):
+        self.store.close()
+        os.remove(self.filename)
+
+    def test_load_quick(self):
+        res = {"status": "success", "data": [{
+            "name": "Name", "type": {"text": "Traditional Cache"}, "available": True, "container": {"text": "Micro"},
+            "difficulty": {"text": 1.5}, "terrain": {"text": 2}, "hidden": "1/2/2010", "owner": {"text": "Author"},
+            "fp": "5", "subrOnly": False, "g": GUID,
+        }]}
+        with mock.patch.object(self.gc, "_request", return_value=res):
+            Cache(self.gc, "GC12345").load_quick()
+
+        with mock.patch.object(Cache, "load") as load:
+            cache = self.gc.get_cache("GC12345")
+            self.assertEqual(cache.name, "Name")
+            self.assertEqual(cache.size, Size.micro)
+            self.assertFalse(load.called)
+
+            with self.subTest("missing property is loaded"):
+                with self.assertRaises(AttributeError):
+                    cache.description
+                self.assertTrue(load.called)
+
+        with self.subTest("get cache by GUID"):
+            with mock.patch.object(self.gc, "_request") as request:
+                cache = self.gc.get_cache(guid=GUID)
+                self.assertEqual((cache.wp, cache.name), ("GC12345", "Name"))
+                self.assertFalse(request.called)
+
+    def test_api_record(self):
+        cache = Cache._from_api_record(self.gc, self.record)
+        self.assertEqual((cache.id, cache.last_found), (123, datetime.date(2020, 6, 10)))
+        self.assertTrue(cache.did_not_find)
+        self.assertFalse(cache.has_log_draft)
+
+        stored = self.store.get("GC12345")
+        self.assertEqual(stored["location"][0], Point(49.5, 13.25))
+        self.assertEqual(stored["hidden"][0], datetime.date(2010, 1, 2))
+        self.assertNotIn("found", stored)
+        self.assertNotIn("summary", stored)
+
+    def test_api_record_never_found(self):
+        cache = Cache._from_api_record(self.gc, dict(self.record, lastFoundDate="0001-01-01T00:00:00"))
+        self.assertIsNone(cache.last_found)
+
+    def test_plan_refresh(self):
+        records = [dict(self.record, code="GC{}".format(i), id=i) for i in range(1, 4)]
+        with mock.patch("pycaching.cachestore.time.time", return_value=1000):
+            for record in records:
+                Cache._from_api_record(self.gc, record)
+
+        with mock.patch("pycaching.cachestore.time.time", return_value=2000):
+            caches = [
+                Cache._from_api_record(self.gc, dict(records[0], favoritePoints=6, lastFoundDate="2021-01-01")),
+                Cache._from_api_record(self.gc, dict(records[1], hasLogDraft=True, lastFoundDate="2021-01-01")),
+                Cache._from_api_record(self.gc, records[2]),
+                Cache._from_api_record(self.gc, dict(self.record, code="GC4", id=4)),
+            ]
+        plan = self.store.plan_refresh(caches, 2000)
+        self.assertEqual([c.wp for c in plan.details], ["GC1", "GC4"])
+        self.assertEqual([c.wp for c in plan.logbook], ["GC1", "GC2"])
+
+    def test_no_store(self):
+        gc = Geocaching()
+        cache = Cache(gc, "GC12345", name="Name")
+        cache._store(["name"])
+        self.assertFalse(cache._load_stored())
+
+
+class TestLoadBetweenSearches(NetworkedTest):
+    # the API returns more precise coordinates and a different author name than the cache page
+    record = dict(TestWriteThrough.record, code="GC4808G", name="Nekonecne ticho", owner={"username": "bifurkacni"},
+                  postedCoordinates={"latitude": 49.730833, "longitude": 13.38175})
+
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+        self.store = CacheStore(self.filename)
+        self.gc = Geocaching(session=self.session, cache_store=self.store)
+        self.gc._logged_in = True
+
+    def tearDown(self):
+        self.store.close()
+        os.remove(self.filename)
+
+    def test_plan_refresh(self):
+        Cache._from_api_record(self.gc, self.record)
+        with self.recorder.use_cassette('cache_explicit_load'):
+            loaded = Cache(self.gc, "GC4808G")
+            loaded.load()
+        self.assertNotEqual(self.store.get("GC4808G")["location"][0], Point(49.730833, 13.38175))
+
+        since = time.time()
+        caches = [Cache._from_api_record(self.gc, self.record)]
+        self.assertEqual(self.store.plan_refresh(caches, since), ([], []))
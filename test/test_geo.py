@@ -6,12 +6,12 @@ import unittest
 from os import path
 from unittest import mock
 
-from geopy.distance import great_circle
+from geopy.distance import great_circle, geodesic
 
-from pycaching import Cache
-from pycaching.errors import GeocodeError, BadBlockError
-from pycaching.geo import Point, Polygon, Rectangle, Tile, UTFGridPoint, Block
-from pycaching.geo import to_decimal
+from pycaching import Cache, Geocaching
+from pycaching.errors import GeocodeError, BadBlockError, ValueError as PycachingValueError
+from pycaching.geo import Point, Polygon, Rectangle, Tile, UTFGridPoint, Block, BlockSizeStats
+from pycaching.geo import to_decimal, distances, bearings
 from . import NetworkedTest
 
 _sample_caches_file = path.join(path.dirname(__file__), "sample_caches.csv")
@@ -137,6 +137,45 @@ class TestPoint(NetworkedTest):
         self.assertEqual(Point(-49.73012, -13.40102).format_gc(), "S 49° 43.807, W 13° 24.061")
 
 
+class TestDistances(unittest.TestCase):
+    def setUp(self):
+        self.origin = Point(49.74, 13.38)
+        self.points = [Point(49.74, 13.38), Point(50.08, 14.42), Point(-33.86, 151.21), Point(49.74, 10.0),
+                       Point(40.0, 13.38)]
+
+    def test_distances(self):
+        with self.subTest("spherical"):
+            for distance, p in zip(distances(self.origin, self.points), self.points):
+                self.assertAlmostEqual(distance, great_circle(self.origin, p).meters, places=3)
+
+        with self.subTest("ellipsoidal"):
+            for distance, p in zip(distances(self.origin, self.points, ellipsoidal=True), self.points):
+                self.assertAlmostEqual(distance, geodesic(self.origin, p).meters, places=3)
+
+        with self.subTest("pairwise"):
+            origins = list(reversed(self.points))
+            expected = [great_circle(a, b).meters for a, b in zip(origins, self.points)]
+            for distance, reference in zip(distances(origins, self.points), expected):
+                self.assertAlmostEqual(distance, reference, places=3)
+
+            with self.assertRaises(PycachingValueError):
+                distances(origins[1:], self.points)
+
+    def test_bearings(self):
+        with self.subTest("spherical"):
+            results = bearings(self.origin, self.points[3:])
+            self.assertAlmostEqual(results[0], 271.29, places=2)  # west, but a bit north on a sphere
+            self.assertAlmostEqual(results[1], 180)
+
+        with self.subTest("ellipsoidal"):
+            for spherical, ellipsoidal in zip(bearings(self.origin, self.points[1:]),
+                                              bearings(self.origin, self.points[1:], ellipsoidal=True)):
+                self.assertAlmostEqual(spherical, ellipsoidal, delta=0.5)
+
+        with self.subTest("pairwise"):
+            self.assertAlmostEqual(bearings([self.points[4]], [self.origin])[0], 0)
+
+
 class TestPolygon(unittest.TestCase):
     def setUp(self):
         self.p = Polygon(*[Point(*i) for i in [
@@ -161,6 +200,29 @@ class TestPolygon(unittest.TestCase):
         with self.subTest("longitude"):
             self.assertEqual(mp.longitude, -23.0)
 
+    def test_contains(self):
+        # concave "U" shape opened to the north
+        u_shape = Polygon(*[Point(*i) for i in [
+            (10., 0.), (0., 0.), (0., 30.), (10., 30.), (10., 20.), (5., 20.), (5., 10.), (10., 10.)]])
+        inside_points = [Point(*i) for i in [(1., 1.), (8., 5.), (8., 25.), (2., 15.), (9.9, 29.9)]]
+        outside_points = [Point(*i) for i in [(8., 15.), (6., 15.), (11., 5.), (-1., 15.), (5., 31.), (5., -1.)]]
+
+        for p in inside_points:
+            self.assertIn(p, u_shape)
+        for p in outside_points:
+            self.assertNotIn(p, u_shape)
+
+        with self.subTest("many points"):
+            points = inside_points + outside_points
+            self.assertEqual(u_shape.contains_many(points), [p in u_shape for p in points])
+            self.assertEqual(u_shape.contains_many(points), [True] * 5 + [False] * 6)
+
+        with self.subTest("agrees with rectangle"):
+            rect = Rectangle(Point(10., 20.), Point(30., -5.))
+            polygon = Polygon(*rect.points)
+            points = [Point(lat + 0.5, lon + 0.5) for lat in range(0, 40, 3) for lon in range(-10, 30, 3)]
+            self.assertEqual(polygon.contains_many(points), rect.contains_many(points))
+
 
 class TestRectangle(unittest.TestCase):
     def setUp(self):
@@ -176,9 +238,25 @@ class TestRectangle(unittest.TestCase):
         for p in outside_points:
             self.assertFalse(p in self.rect)
 
+        with self.subTest("many points"):
+            points = inside_points + outside_points
+            self.assertEqual(self.rect.contains_many(points), [True] * 5 + [False] * 5)
+
     def test_diagonal(self):
         self.assertAlmostEqual(self.rect.diagonal, 3411261.6697293497)
 
+    def test_split(self):
+        quadrants = self.rect.split()
+        self.assertEqual(len(quadrants), 4)
+        self.assertEqual([(q.corners[0], q.corners[1]) for q in quadrants], [
+            (Point(30., -5.), Point(20., 7.5)),
+            (Point(30., 7.5), Point(20., 20.)),
+            (Point(20., -5.), Point(10., 7.5)),
+            (Point(20., 7.5), Point(10., 20.)),
+        ])
+        for p in [Point(10., 20.), Point(30., -5.), Point(20., 7.5), Point(18., 15.)]:
+            self.assertTrue(any(p in q for q in quadrants))
+
 
 class TestTile(NetworkedTest):
     # see
@@ -224,6 +302,20 @@ class TestTile(NetworkedTest):
             expected_caches.pop(c.wp)
         self.assertEqual(len(expected_caches), 0)
 
+    def test_decode_blocks(self):
+        data = {
+            "(0, 0)": [{"i": "GC1", "n": "First"}],
+            "(0, 1)": [{"i": "GC1", "n": "First"}, {"i": "GC2", "n": "Second"}],
+            "(10, 12)": [{"i": "GC2", "n": "Second"}],
+        }
+        blocks = self.tile._decode_blocks(data)
+        self.assertEqual(set(blocks), {"GC1", "GC2"})
+        self.assertEqual(blocks["GC1"].cache_name, "First")
+        self.assertIs(blocks["GC1"].tile, self.tile)
+        self.assertEqual(blocks["GC1"].points, {UTFGridPoint(0, 0), UTFGridPoint(0, 1)})
+        self.assertEqual(blocks["GC2"].points, {UTFGridPoint(0, 1), UTFGridPoint(10, 12)})
+        self.assertEqual(self.tile._decode_blocks({}), {})
+
     def test_precision(self):
         with self.subTest("with point coorection"):
             t1 = make_tile(0, 0, 14)[0]
@@ -292,7 +384,6 @@ class TestBlock(unittest.TestCase):
 
     def setUp(self):
         self.b = Block()
-        Block.instances = []
 
     def _generate_blocks(self, case, num=100):
         """Generate some blocks for testing block sizes"""
@@ -301,47 +392,76 @@ class TestBlock(unittest.TestCase):
             block.points = self.good_cases[case][0]
         return blocks
 
+    def _stats(self, *counts):
+        """Return statistics of blocks generated for given {case: number of blocks}."""
+        stats = BlockSizeStats()
+        for case, num in counts:
+            stats.update(self._generate_blocks(case, num))
+        return stats
+
     def test_determine_block_size(self):
         """Test if correct size is determined based on passed points"""
 
         with self.subTest("initial value"):
             self.assertEqual(Block.size, 3)
+            self.assertEqual(BlockSizeStats().mean, 3)
+            self.assertEqual(BlockSizeStats().size, 3)
 
         with self.subTest("all blocks has 9 points"):
-            blocks = self._generate_blocks(9, 100)
-            Block.determine_block_size()
-            self.assertEqual(Block.size, 3)
-            del blocks
+            self.assertEqual(self._stats((9, 100)).determine_size(), 3)
 
         with self.subTest("most blocks has 9 points, some has 6 points"):
-            blocks = self._generate_blocks(9, 100) + self._generate_blocks(6, 20)
-            Block.determine_block_size()
-            self.assertEqual(Block.size, 3)
-            del blocks
+            self.assertEqual(self._stats((9, 100), (6, 20)).determine_size(), 3)
 
         with self.subTest("most blocks has 9 points, some has other num of points"):
-            blocks = self._generate_blocks(9, 100) + self._generate_blocks(6, 20)
-            blocks += self._generate_blocks(3, 10) + self._generate_blocks(1, 2)
-            Block.determine_block_size()
-            self.assertEqual(Block.size, 3)
-            del blocks
+            self.assertEqual(self._stats((9, 100), (6, 20), (3, 10), (1, 2)).determine_size(), 3)
 
         with self.subTest("small number of instances"):
-            blocks = self._generate_blocks(9, 10)
+            stats = self._stats((9, 10))
             with self.assertLogs(level=logging.WARNING):
-                Block.determine_block_size()
-            self.assertEqual(Block.size, 3)
-            del blocks
+                stats.determine_size()
+            self.assertEqual(stats.size, 3)
 
         with self.subTest("all blocks has 4 points"):
-            blocks = self._generate_blocks(4, 100)
+            stats = self._stats((4, 100))
             with self.assertLogs(level=logging.WARNING):
-                Block.determine_block_size()
-            self.assertEqual(Block.size, 2)
-            del blocks
+                stats.determine_size()
+            self.assertEqual(stats.size, 2)
+            self.assertEqual(Block.size, 3)
 
-        # set back to initial value
-        Block.size = 3
+        with self.subTest("statistics are updated incrementally"):
+            stats = self._stats((9, 100))
+            stats.update(self._generate_blocks(4, 100))
+            self.assertEqual(stats.count, 200)
+            self.assertAlmostEqual(stats.mean, 2.5)
+
+        with self.subTest("deprecated class-level size"):
+            try:
+                with self.assertWarns(FutureWarning):
+                    Block.determine_block_size()
+                self.assertEqual(Block.size, 3)
+                with self.assertWarns(FutureWarning):
+                    Block.determine_block_size(self._stats((4, 100)))
+                self.assertEqual(Block.size, 2)
+            finally:
+                Block.size = 3
+
+    def test_size_per_geocaching(self):
+        """Test that blocks use the size determined for their Geocaching instance"""
+        gc1, gc2 = Geocaching(), Geocaching()
+        gc1._block_size_stats.update(self._generate_blocks(4, 100))
+        gc1._block_size_stats.determine_size()
+
+        block1, block2 = Block(Tile(gc1, 0, 0, 1)), Block(Tile(gc2, 0, 0, 1))
+        block1.points = block2.points = [(1, 1), (1, 2), (2, 1), (2, 2)]
+        self.assertEqual((block1._size, block2._size, Block()._size), (2, 3, 3))
+        self.assertEqual(block1.middle_point, UTFGridPoint(1.5, 1.5))
+
+        with self.subTest("block larger than the size of its instance"):
+            block1.points = block2.points = self.good_cases[9][0]
+            block2._check_block()
+            with self.assertRaises(BadBlockError):
+                block1._check_block()
 
     def test_points(self):
         """Test points operations"""
@@ -374,6 +494,15 @@ class TestBlock(unittest.TestCase):
             ref_set.update({UTFGridPoint(*p) for p in points})
             self.assertEqual(self.b.points, ref_set)
 
+        with self.subTest("returned points are immutable"):
+            with self.assertRaises(AttributeError):
+                self.b.points.add(UTFGridPoint(7, 7))
+            self.assertEqual(self.b.points, ref_set)
+
+        with self.subTest("number of points"):
+            self.assertEqual(len(self.b), len(ref_set))
+            self.assertEqual(len(Block()), 0)
+
     def test_middle_point(self):
         """Check that correct middle points are returned"""
         for i, case in self.good_cases.items():
@@ -3,17 +3,30 @@
 import itertools
 import json
 import os
+import time
 import unittest
 from subprocess import CalledProcessError
 from tempfile import NamedTemporaryFile
 from unittest.mock import patch
 
+try:
+    import lxml  # NOQA
+except ImportError:
+    lxml = None
+
+import requests
 from geopy.distance import great_circle
 
 import pycaching
-from pycaching import Cache, Geocaching, Point, Rectangle
-from pycaching.errors import NotLoggedInException, LoginFailedException, PMOnlyException, TooManyRequestsError
-from pycaching.geocaching import SortOrder
+from pycaching import Cache, Geocaching, Point, Rectangle, Trackable
+from pycaching.geo import Tile
+from pycaching.cache import Waypoint
+from pycaching.cachestore import CacheStore
+from pycaching.tilestore import TileStore
+from pycaching.errors import (NotLoggedInException, LoginFailedException, LoadError, PMOnlyException,
+                              TooManyRequestsError, ValueError as PycachingValueError)
+from pycaching.geocaching import SortOrder, CacheLoadResult, SearchCursor
+from pycaching.log import Log
 from . import username as _username, password as _password, NetworkedTest
 
 
@@ -47,6 +60,11 @@ class TestMethods(NetworkedTest):
                 caches = list(self.gc.search(Point(49.733867, 13.397091), 100))
             self.assertNotEqual(caches[0], caches[50])
 
+        with self.subTest("prefetching"):
+            with self.recorder.use_cassette('geocaching_search_pagination'):
+                prefetched = list(self.gc.search(Point(49.733867, 13.397091), 100, prefetch=2))
+            self.assertEqual([c.wp for c in prefetched], [c.wp for c in caches])
+
     @unittest.expectedFailure
     def test_search_quick(self):
         """Perform quick search and check found caches"""
@@ -57,8 +75,8 @@ class TestMethods(NetworkedTest):
 
         with self.subTest("normal"):
             with self.recorder.use_cassette('geocaching_quick_normal'):
-                # Once this feature is fixed, the corresponding cassette will have to be deleted
-                # and re-recorded.
+                # The tile server didn't return the UTFGrids when the cassette was recorded. It has
+                # to be deleted and re-recorded once the server works again.
                 res = [c.wp for c in self.gc.search_quick(rect)]
             for wp in ["GC41FJC", "GC17E8Y", "GC383XN"]:
                 self.assertIn(wp, res)
@@ -82,12 +100,61 @@ class TestMethods(NetworkedTest):
             for c1, c2 in itertools.product(res1, res2):
                 self.assertLess(c1.location.precision, c2.location.precision)
 
+    def test_search_quick_concurrency(self):
+        rect = Rectangle(Point(49.76, 13.35), Point(49.745, 13.37))
+        with open(os.path.join("test", "sample_utfgrid.json"), encoding="utf8") as f:
+            utfgrid = json.load(f)
+
+        def fake_download(tile, **kwargs):
+            time.sleep(0.01)
+            return utfgrid if (tile.x, tile.y) == (8800, 5574) else None
+
+        with patch.object(Tile, "_download_utfgrid", autospec=True, side_effect=fake_download) as download:
+            caches = list(self.gc.search_quick(rect, zoom=14))
+            tiles = {(call[0][0].x, call[0][0].y) for call in download.call_args_list}
+            self.assertIn((8800, 5574), tiles)
+            self.assertGreater(len(tiles), 1)
+
+            with open(os.path.join("test", "sample_caches.csv")) as f:
+                expected = {row.split(",")[0] for row in f}
+            self.assertSetEqual({c.wp for c in caches}, expected)
+
+            with self.subTest("strict"):
+                strict = list(self.gc.search_quick(rect, strict=True, zoom=14, concurrency=1))
+                self.assertLess(len(strict), len(caches))
+                for cache in strict:
+                    self.assertIn(cache.location, rect)
+
+        with self.subTest("stored tiles"):
+            def fake_request(url, *, params, **kwargs):
+                res = requests.Response()
+                if (params["x"], params["y"]) == (8800, 5574) and url.endswith(".info"):
+                    res.status_code, res._content = 200, json.dumps(utfgrid).encode()
+                else:
+                    res.status_code, res._content = 204, b""
+                return res
+
+            with NamedTemporaryFile(suffix=".sqlite", delete=False) as f:
+                filename = f.name
+            store = TileStore(filename)
+            try:
+                gc = Geocaching(tile_store=store)
+                with patch.object(gc, "_request", side_effect=fake_request) as request:
+                    self.assertSetEqual({c.wp for c in gc.search_quick(rect, zoom=14)}, expected)
+                    self.assertTrue(request.called)
+                    request.reset_mock()
+                    self.assertSetEqual({c.wp for c in gc.search_quick(rect, zoom=14)}, expected)
+                    self.assertFalse(request.called)
+            finally:
+                store.close()
+                os.remove(filename)
+
     @unittest.expectedFailure
     def test_search_quick_match_load(self):
         """Test if quick search results matches exact cache locations."""
         rect = Rectangle(Point(49.73, 13.38), Point(49.74, 13.39))
         with self.recorder.use_cassette('geocaching_matchload'):
-            # at commit time, this test is an allowed failure. Once this feature is fixed, the
+            # at commit time, this test is an allowed failure. Once the tile server works again, the
             # corresponding cassette will have to be deleted and re-recorded.
             caches = list(self.gc.search_quick(rect, strict=True, zoom=15))
             for cache in caches:
@@ -110,6 +177,22 @@ class TestMethods(NetworkedTest):
 
 
 class TestAPIMethods(NetworkedTest):
+    def setUp(self):
+        # a search result to fake the API responses with
+        with open(os.path.join("test", "cassettes", "geocaching_api_rate_limit.json")) as f:
+            body = json.load(f)["http_interactions"][0]["response"]["body"]["string"]
+        self.record = json.loads(body)["results"][0]
+
+    def fake_search(self, records):
+        """Return a fake of :meth:`.Geocaching._request` paging through search results.
+
+        :param records: List of result records, or a function returning them for a search box.
+        """
+        def fake_request(url, *, params, **kwargs):
+            found = records(params["box"]) if callable(records) else records
+            return {"total": len(found), "results": found[params["skip"]:params["skip"] + params["take"]]}
+        return fake_request
+
     def test_search_rect(self):
         """Perform search by rect and check found caches."""
         rect = Rectangle(Point(49.73, 13.38), Point(49.74, 13.39))
@@ -151,6 +234,185 @@ class TestAPIMethods(NetworkedTest):
                         waypoints = {cache.wp for cache in caches}
                         self.assertSetEqual(waypoints, expected)
 
+    def test_search_rect_concurrency(self):
+        rect = Rectangle(Point(50.74, 13.38), Point(49.73, 14.40))
+        expected = ["GC{}".format(i) for i in range(20)]
+        search = self.fake_search([dict(self.record, code=wp) for wp in expected])
+
+        def fake_request(url, *, params, **kwargs):
+            # later pages are returned sooner
+            time.sleep((40 - params["skip"]) / 1000)
+            return search(url, params=params, **kwargs)
+
+        with patch.object(self.gc, "_request", side_effect=fake_request) as request:
+            with self.subTest("sequential"):
+                self.assertEqual([c.wp for c in self.gc.search_rect(rect, per_query=2)], expected)
+
+            with self.subTest("ordered"):
+                self.assertEqual([c.wp for c in self.gc.search_rect(rect, per_query=2, concurrency=4)], expected)
+
+            with self.subTest("unordered"):
+                caches = [c.wp for c in self.gc.search_rect(rect, per_query=2, concurrency=4, ordered=False)]
+                self.assertCountEqual(caches, expected)
+
+        self.assertEqual(request.call_count, 30)
+
+    def test_search_rect_resume(self):
+        rect = Rectangle(Point(50.74, 13.38), Point(49.73, 14.40))
+        expected = ["GC{}".format(i) for i in range(10)]
+        fake_request = self.fake_search([dict(self.record, code=wp) for wp in expected])
+
+        with patch.object(self.gc, "_request", side_effect=fake_request) as request:
+            with self.subTest("interrupted"):
+                cursor = SearchCursor(rect, per_query=3)
+                caches = self.gc.search_rect(resume=cursor)
+                self.assertEqual([c.wp for c in itertools.islice(caches, 4)], expected[:4])
+                caches.close()
+                self.assertEqual((cursor.offset, cursor.total), (4, 10))
+                self.assertFalse(cursor.finished)
+
+            with self.subTest("resumed"):
+                request.reset_mock()
+                self.assertEqual([c.wp for c in self.gc.search_rect(resume=cursor, concurrency=2)], expected[4:])
+                self.assertEqual([call[1]["params"]["skip"] for call in request.call_args_list], [4, 7])
+                self.assertTrue(cursor.finished)
+
+        with self.subTest("unsupported modes"):
+            unsupported = [{}, {"resume": cursor, "split_over": 5},
+                           {"resume": cursor, "concurrency": 2, "ordered": False}]
+            for kwargs in unsupported:
+                with self.assertRaises(PycachingValueError):
+                    next(self.gc.search_rect(**kwargs))
+
+    def test_search_cursor(self):
+        origin = Point(49.5, 14.0)
+        cursor = SearchCursor(Rectangle(Point(50.74, 13.38), Point(49.73, 14.40)), per_query=50,
+                              sort_by="distance", origin=origin, asc=False, offset=100, total=1000)
+
+        with NamedTemporaryFile(mode="w", delete=False) as f:
+            filename = f.name
+        try:
+            cursor.save(filename)
+            loaded = SearchCursor.load(filename)
+        finally:
+            os.remove(filename)
+
+        self.assertEqual(loaded.to_dict(), cursor.to_dict())
+        self.assertEqual(loaded.rect.corners, [Point(50.74, 13.38), Point(49.73, 14.40)])
+        self.assertEqual(loaded.origin, origin)
+        self.assertIs(loaded.sort_by, SortOrder.distance)
+        self.assertFalse(loaded.asc)
+
+    def test_sync_rect(self):
+        rect = Rectangle(Point(50.74, 13.38), Point(49.73, 14.40))
+        records = [dict(self.record, code="GC{}".format(i)) for i in range(30)]
+        fake_request = self.fake_search(records)
+
+        with NamedTemporaryFile(suffix=".sqlite", delete=False) as f:
+            filename = f.name
+        store = CacheStore(filename)
+        gc = Geocaching(cache_store=store)
+        try:
+            with patch.object(gc, "_request", side_effect=fake_request) as request:
+                with self.subTest("first sync"):
+                    self.assertEqual([c.wp for c in gc.sync_rect(rect, per_query=10)], [r["code"] for r in records])
+                    self.assertEqual(len(store), 30)
+                    params = request.call_args[1]["params"]
+                    self.assertEqual((params["sort"], params["asc"]), ("datelastvisited", "false"))
+
+                with self.subTest("nothing changed"):
+                    request.reset_mock()
+                    self.assertEqual(list(gc.sync_rect(rect, per_query=10)), [])
+                    self.assertEqual(request.call_count, 2)
+                    request.reset_mock()
+                    self.assertEqual(list(gc.sync_rect(rect, per_query=10, stop_after=3)), [])
+                    self.assertEqual(request.call_count, 1)
+
+                with self.subTest("new and changed caches"):
+                    records[:0] = [dict(self.record, code="GC30")]
+                    records[1] = dict(records[1], favoritePoints=records[1]["favoritePoints"] + 1)
+                    self.assertEqual([c.wp for c in gc.sync_rect(rect, per_query=10, stop_after=3)], ["GC30", "GC0"])
+
+                with self.subTest("cache moved to the top without any changed property"):
+                    request.reset_mock()
+                    records[:0] = [records.pop(16)]
+                    self.assertEqual(records[0]["code"], "GC15")
+                    self.assertEqual([c.wp for c in gc.sync_rect(rect, per_query=10, stop_after=1)], ["GC15"])
+                    self.assertEqual(request.call_count, 1)
+
+                with self.subTest("changed cache after fewer unchanged ones"):
+                    records[5] = dict(records[5], favoritePoints=records[5]["favoritePoints"] + 1)
+                    self.assertEqual(records[5]["code"], "GC3")
+                    self.assertEqual([c.wp for c in gc.sync_rect(rect, per_query=10, stop_after=6)], ["GC3"])
+
+                with self.subTest("cache loaded between syncs"):
+                    # the cache page shows the author and location in another form than the API
+                    loaded = Cache(gc, "GC0", author="A cache by someone", location=Point(49.5, 13.5))
+                    loaded._store(["author", "location"])
+                    self.assertEqual(list(gc.sync_rect(rect, per_query=10, stop_after=6)), [])
+
+            with self.subTest("unsupported"):
+                with self.assertRaises(PycachingValueError):
+                    next(gc.sync_rect(rect, sort_by=SortOrder.distance))
+                with self.assertRaises(PycachingValueError):
+                    next(Geocaching().sync_rect(rect))
+        finally:
+            store.close()
+            os.remove(filename)
+
+    def test_search_rect_split(self):
+        rect = Rectangle(Point(50.0, 14.0), Point(49.0, 15.0))
+
+        # a grid of caches, including some on the quadrant boundaries
+        locations = {"GC{}".format(i): (49.0 + (i // 9) / 8, 14.0 + (i % 9) / 8) for i in range(81)}
+        expected = sorted(locations)
+
+        def search_box(box):
+            north, west, south, east = map(float, box.split(","))
+            found = sorted(wp for wp, (lat, lon) in locations.items() if south <= lat <= north and west <= lon <= east)
+            return [dict(self.record, code=wp) for wp in found]
+
+        fake_request = self.fake_search(search_box)
+
+        with patch.object(self.gc, "_request", side_effect=fake_request) as request:
+            with self.subTest("sequential"):
+                caches = [c.wp for c in self.gc.search_rect(rect, per_query=5, split_over=10)]
+                self.assertCountEqual(caches, expected)
+                skips = [call[1]["params"]["skip"] for call in request.call_args_list]
+                self.assertLessEqual(max(skips), 10)
+
+            with self.subTest("concurrent"):
+                caches = [c.wp for c in self.gc.search_rect(rect, per_query=5, split_over=10, concurrency=4)]
+                self.assertCountEqual(caches, expected)
+
+            with self.subTest("not split"):
+                request.reset_mock()
+                caches = [c.wp for c in self.gc.search_rect(rect, per_query=50, split_over=100)]
+                self.assertEqual(caches, expected)
+                self.assertEqual(request.call_count, 2)
+
+            with self.subTest("rate limited"):
+                request.reset_mock()
+                limited = [False, True]
+
+                def limited_request(url, **kwargs):
+                    if limited.pop(0) if limited else False:
+                        raise TooManyRequestsError(url)
+                    return fake_request(url, **kwargs)
+
+                request.side_effect = limited_request
+                caches = list(self.gc.search_rect(rect, per_query=50, split_over=100, wait_sleep=False))
+                self.assertEqual([c is None for c in caches].index(True), 50)
+                self.assertEqual([c.wp for c in caches if c is not None], expected)
+                # the search continues from the offset reached before the limit
+                self.assertEqual([call[1]["params"]["skip"] for call in request.call_args_list], [0, 50, 50])
+                request.side_effect = fake_request
+
+            with self.subTest("same location"):
+                locations = {"GC{}".format(i): (49.5, 14.5) for i in range(20)}
+                caches = [c.wp for c in self.gc.search_rect(rect, per_query=5, split_over=10)]
+                self.assertCountEqual(caches, sorted(locations))
+
     def test_recover_from_rate_limit(self):
         """Test recovering from API rate limit exception."""
         rect = Rectangle(Point(50.74, 13.38), Point(49.73, 14.40))  # large rectangle
@@ -261,6 +523,82 @@ class TestLoginOperations(NetworkedTest):
             self.gc.login(_username, _password)
             self.assertEqual(self.gc.get_logged_user(), _username)
 
+    def test_session(self):
+        try:
+            with NamedTemporaryFile(dir=".", delete=False) as session_file:
+                pass
+
+            with self.subTest("not logged in"):
+                with self.assertRaises(NotLoggedInException):
+                    self.gc.save_session(session_file.name)
+
+            with self.recorder.use_cassette('geocaching_loggeduser'):
+                self.gc.login(_username, _password)
+                os.chmod(session_file.name, 0o644)
+                self.gc.save_session(session_file.name)
+                self.assertEqual(os.stat(session_file.name).st_mode & 0o777, 0o600)
+
+                with self.subTest("restore and validate"):
+                    cookies = list(self.session.cookies)
+                    self.session.cookies.clear()
+                    gc = Geocaching(session=self.session)
+                    self.assertTrue(gc.load_session(session_file.name))
+                    self.assertEqual(gc._logged_username, _username)
+                    self.assertEqual({c.name for c in self.session.cookies}, {c.name for c in cookies})
+
+            with self.subTest("different user"):
+                gc = Geocaching(session=self.session)
+                self.assertFalse(gc.load_session(session_file.name, username=_username + "1"))
+                self.assertFalse(gc._logged_in)
+
+            with self.subTest("expired"):
+                with patch("http.cookiejar.Cookie.is_expired", return_value=True):
+                    self.assertFalse(gc.load_session(session_file.name))
+
+            with self.subTest("invalid"):
+                with patch.object(Geocaching, "get_logged_user", return_value=None):
+                    self.assertFalse(gc.load_session(session_file.name))
+                self.assertFalse(gc._logged_in)
+
+            with self.subTest("invalid keeps other cookies"):
+                session = requests.Session()
+                session.cookies.set("other", "1", domain="example.com")
+                session.cookies.set(cookies[0].name, "old", domain=cookies[0].domain, path=cookies[0].path)
+                gc = Geocaching(session=session)
+                with patch.object(Geocaching, "get_logged_user", return_value=None):
+                    self.assertFalse(gc.load_session(session_file.name))
+                self.assertEqual({(c.name, c.value) for c in session.cookies},
+                                 {("other", "1"), (cookies[0].name, "old")})
+
+            with self.subTest("login skipped when session is restored"):
+                gc = Geocaching(session=self.session)
+                with patch.object(Geocaching, "get_logged_user", return_value=_username):
+                    with patch.object(Geocaching, "_load_credentials") as load_credentials:
+                        gc.login(session_file=session_file.name)
+                self.assertFalse(load_credentials.called)
+                self.assertTrue(gc._logged_in)
+
+            with self.subTest("login falls back and saves the session"):
+                gc = Geocaching(session=self.session)
+                with patch.object(Geocaching, "load_session", return_value=False):
+                    with patch.object(Geocaching, "_request"):
+                        with patch.object(Geocaching, "get_logged_user", return_value=_username):
+                            with patch.object(Geocaching, "save_session") as save_session:
+                                gc.login(_username, _password, session_file=session_file.name)
+                save_session.assert_called_once_with(session_file.name)
+
+            with self.subTest("broken session file"):
+                with open(session_file.name, "w") as f:
+                    f.write("{}")
+                gc = Geocaching(session=self.session)
+                with patch.object(Geocaching, "_request"), \
+                        patch.object(Geocaching, "get_logged_user", return_value=_username), \
+                        patch.object(Geocaching, "save_session"):
+                    with self.assertLogs(level="WARNING"):
+                        gc.login(_username, _password, session_file=session_file.name)
+        finally:
+            os.remove(session_file.name)
+
     def test_logout(self):
         with self.recorder.use_cassette('geocaching_logout'):
             self.gc.login(_username, _password)
@@ -455,6 +793,99 @@ class TestLoginOperations(NetworkedTest):
         self.gc._credentials_file = filename_backup
 
 
+class ParsingAgreementMixin(object):
+    """Test that different parsing configurations extract the same data from the same pages."""
+
+    # keyword arguments of Geocaching instances to compare
+    configurations = ()
+
+    def snapshot(self, value):
+        """Convert loaded objects to plain data, so they can be compared."""
+        if isinstance(value, (Cache, Waypoint, Trackable, Log)):
+            return {k: self.snapshot(v) for k, v in vars(value).items() if k not in ("geocaching", "_geocaching")}
+        if isinstance(value, dict):
+            return {k: self.snapshot(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.snapshot(v) for v in value]
+        return value
+
+    def assertConfigurationsAgree(self, cassette, load):
+        snapshots = []
+        for configuration in self.configurations:
+            gc = Geocaching(session=self.session, **configuration)
+            gc._logged_in = True
+            try:
+                with self.recorder.use_cassette(cassette):
+                    snapshots.append(self.snapshot(load(gc)))
+            finally:
+                gc.close()
+        self.assertTrue(snapshots[0])
+        self.assertEqual(*snapshots)
+
+    def test_cache(self):
+        def load(gc):
+            cache = Cache(gc, "GC4808G")
+            cache.load()
+            return cache
+
+        self.assertConfigurationsAgree('cache_explicit_load', load)
+
+    def test_cache_by_guid(self):
+        def load(gc):
+            cache = Cache(gc, "GC2WXPN", guid="5f45114d-1d79-4fdb-93ae-8f49f1d27188")
+            cache.load_by_guid()
+            return cache
+
+        self.assertConfigurationsAgree('cache_guidload_normal', load)
+
+    def test_trackable(self):
+        def load(gc):
+            trackable = Trackable(gc, "TB1KEZ9")
+            trackable.load()
+            return trackable
+
+        self.assertConfigurationsAgree('trackable_load_tid', load)
+
+    def test_my_finds(self):
+        self.assertConfigurationsAgree('geocaching_my_finds', lambda gc: list(gc.my_finds(20)))
+
+    def test_search(self):
+        self.assertConfigurationsAgree('geocaching_search', lambda gc: list(gc.search(Point(49.733867, 13.397091), 20)))
+
+    def test_get_caches(self):
+        self.assertConfigurationsAgree('geocaching_shortcut_getcache',
+                                       lambda gc: [r.cache for r in gc.get_caches(["GC4808G"])])
+
+
+@unittest.skipIf(lxml is None, "lxml is not installed")
+class TestParsers(ParsingAgreementMixin, NetworkedTest):
+    configurations = {"parser": "html.parser"}, {"parser": "lxml"}
+
+    def test_parser(self):
+        self.assertEqual(Geocaching()._parser, "lxml")
+        self.assertEqual(Geocaching(parser="html.parser")._parser, "html.parser")
+
+
+class TestParseProcesses(ParsingAgreementMixin, NetworkedTest):
+    configurations = {}, {"parse_processes": 2}
+
+    def test_pool(self):
+        gc = Geocaching(parse_processes=1)
+        self.assertIsNone(gc._parse_pool)
+
+        with self.subTest("started lazily"):
+            self.assertEqual(gc._parse(Geocaching._parse_search_page, "<p></p>", size_mapping={}), ([], {}))
+            self.assertIsNotNone(gc._parse_pool)
+
+        with self.subTest("errors are propagated"):
+            with self.assertRaises(LoadError):
+                gc._parse(Cache._parse_details_page, "<html></html>")
+
+        with self.subTest("closed"):
+            gc.close()
+            self.assertIsNone(gc._parse_pool)
+
+
 class TestShortcuts(NetworkedTest):
     def test_login(self):
         real_init = Geocaching.__init__
@@ -482,6 +913,34 @@ class TestShortcuts(NetworkedTest):
             cache = self.gc.get_cache(guid='15ad3a3d-92c1-4f7c-b273-60937bcc2072')
             self.assertEqual("Nekonecne ticho", cache.name)
 
+    def test_get_caches(self):
+        with self.subTest("errors are reported per cache"):
+            with self.recorder.use_cassette('geocaching_shortcut_getcache'):
+                results = list(self.gc.get_caches(["GC4808G", "xxx"], concurrency=2))
+            self.assertEqual([r.key for r in results], ["GC4808G", "xxx"])
+            self.assertEqual(results[0].cache.name, "Nekonecne ticho")
+            self.assertIsNone(results[0].error)
+            self.assertIsNone(results[1].cache)
+            self.assertIsInstance(results[1].error, PycachingValueError)
+
+        with self.subTest("partially loaded PM only caches"):
+            with patch.object(Cache, "load", autospec=True, side_effect=PMOnlyException):
+                results = list(self.gc.get_caches(["GC1", "GC2", "GC3"], ordered=False))
+            self.assertCountEqual([r.key for r in results], ["GC1", "GC2", "GC3"])
+            for result in results:
+                self.assertIsInstance(result, CacheLoadResult)
+                self.assertEqual(result.cache.wp, result.key)
+                self.assertIsInstance(result.error, PMOnlyException)
+
+        with self.subTest("quick mode"):
+            with patch.object(Cache, "load_quick", autospec=True) as load_quick:
+                list(self.gc.get_caches(["GC1", "GC2"], mode="quick"))
+            self.assertEqual(load_quick.call_count, 2)
+
+        with self.subTest("invalid mode"):
+            with self.assertRaises(PycachingValueError):
+                self.gc.get_caches(["GC1"], mode="xxx")
+
     def test_get_trackable(self):
         with self.recorder.use_cassette('geocaching_shortcut_gettrackable'):
             t = self.gc.get_trackable("TB1KEZ9")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from pycaching.cache import Cache
+from pycaching.geocaching import Geocaching
+from pycaching.httpcache import ResponseCache, CachedResponse
+from . import NetworkedTest
+
+
+def make_response(content=b"<html></html>", url="https://www.geocaching.com/", headers=None):
+    res = requests.Response()
+    res.url = url
+    res.status_code = 200
+    res.headers = requests.structures.CaseInsensitiveDict(headers or {"Content-Type": "text/html"})
+    res.encoding = "utf-8"
+    res._content = content
+    return res
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+        self.cache = ResponseCache(self.filename, ttls={"logbook": None, "custom": 5}, max_size=100)
+
+    def tearDown(self):
+        self.cache.close()
+        os.remove(self.filename)
+
+    def test_ttl(self):
+        self.assertEqual(self.cache.ttl("cache_details"), ResponseCache.default_ttls["cache_details"])
+        self.assertEqual(self.cache.ttl("custom"), 5)
+        self.assertIsNone(self.cache.ttl("logbook"))
+        self.assertIsNone(self.cache.ttl(None))
+
+    def test_key(self):
+        key = ResponseCache.key("url", {"a": 1, "b": 2}, "user")
+        self.assertEqual(key, ResponseCache.key("url", {"b": "2", "a": "1"}, "user"))
+        self.assertNotEqual(key, ResponseCache.key("url", {"a": 1, "b": 2}, "other user"))
+        self.assertNotEqual(key, ResponseCache.key("url", {"a": 1}, "user"))
+        self.assertNotEqual(key, ResponseCache.key("other url", {"a": 1, "b": 2}, "user"))
+
+    def test_put_get(self):
+        with self.subTest("not stored"):
+            self.assertIsNone(self.cache.get("key"))
+
+        with self.subTest("stored"):
+            self.cache.put("key", make_response(b"abc", headers={"ETag": "x"}))
+            cached = self.cache.get("key")
+            self.assertIsInstance(cached, CachedResponse)
+            self.assertLess(cached.age, 5)
+
+            res = cached.to_response()
+            self.assertEqual(res.content, b"abc")
+            self.assertEqual(res.text, "abc")
+            self.assertEqual(res.headers["etag"], "x")
+            self.assertEqual(res.url, "https://www.geocaching.com/")
+
+        with self.subTest("persistent"):
+            self.cache.close()
+            self.cache = ResponseCache(self.filename)
+            self.assertEqual(self.cache.get("key").content, b"abc")
+
+        with self.subTest("clear"):
+            self.cache.clear()
+            self.assertIsNone(self.cache.get("key"))
+            self.assertEqual(self.cache.size, 0)
+
+    def test_refresh(self):
+        self.cache.put("key", make_response())
+        with mock.patch("pycaching.httpcache.time.time", return_value=2e9):
+            self.assertGreater(self.cache.get("key").age, 0)
+            self.cache.refresh("key")
+            self.assertEqual(self.cache.get("key").age, 0)
+
+    def test_validators(self):
+        cached = CachedResponse("url", 200, {"ETag": "x", "Last-Modified": "y"}, b"", None, 0)
+        self.assertEqual(cached.validators(), {"If-None-Match": "x", "If-Modified-Since": "y"})
+        cached = CachedResponse("url", 200, {}, b"", None, 0)
+        self.assertEqual(cached.validators(), {})
+
+        with self.subTest("header names in any case"):
+            cached = CachedResponse("url", 200, {"etag": "x", "last-modified": "y"}, b"", None, 0)
+            self.assertEqual(cached.validators(), {"If-None-Match": "x", "If-Modified-Since": "y"})
+            self.cache.put("key", make_response(b"abc", headers={"etag": "x"}))
+            self.assertEqual(self.cache.get("key").validators(), {"If-None-Match": "x"})
+
+    def test_eviction(self):
+        with mock.patch("pycaching.httpcache.time.time", side_effect=range(100)):
+            for key in "ab":
+                self.cache.put(key, make_response(b"x" * 40))
+            self.cache.get("a")  # "b" is now the least recently used
+            self.cache.put("c", make_response(b"x" * 40))
+
+        self.assertLessEqual(self.cache.size, 100)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+        with self.subTest("too large response is not stored"):
+            self.cache.put("e", make_response(b"x" * 101))
+            self.assertIsNone(self.cache.get("e"))
+
+
+class TestGeocaching(NetworkedTest):
+    def setUp(self):
+        super().setUp()
+        handle, self.filename = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+        self.response_cache = ResponseCache(self.filename)
+        self.gc = Geocaching(session=self.session, response_cache=self.response_cache)
+        self.gc._logged_in = True
+
+    def tearDown(self):
+        self.response_cache.close()
+        os.remove(self.filename)
+
+    def test_request(self):
+        with self.subTest("repeated loading is served from cache"):
+            with self.recorder.use_cassette('geocaching_shortcut_getcache'):
+                with mock.patch.object(self.session, "request", wraps=self.session.request) as request:
+                    Cache(self.gc, "GC4808G").load()
+                    cache = Cache(self.gc, "GC4808G")
+                    cache.load()
+            self.assertEqual(request.call_count, 1)
+            self.assertEqual("Nekonecne ticho", cache.name)
+
+        with self.subTest("stale response is revalidated"):
+            key = ResponseCache.key("https://www.geocaching.com/seek/cache_details.aspx", {"wp": "GC4808G"})
+            stale = self.response_cache.get(key)
+            stale.stored = 0
+            stale.headers["ETag"] = "abc"
+            not_modified = make_response(b"")
+            not_modified.status_code = 304
+            with mock.patch.object(self.response_cache, "get", return_value=stale):
+                with mock.patch.object(self.session, "request", return_value=not_modified) as request:
+                    cache = Cache(self.gc, "GC4808G")
+                    cache.load()
+            self.assertEqual(request.call_args[1]["headers"], {"If-None-Match": "abc"})
+            self.assertEqual("Nekonecne ticho", cache.name)
+            self.assertLess(self.response_cache.get(key).age, 5)
+
+        with self.subTest("other endpoints are not cached"):
+            with mock.patch.object(self.session, "request", return_value=make_response(b"{}")) as request:
+                self.gc._request("api/geocode", expect="json")
+                self.gc._request("api/geocode", expect="json")
+            self.assertEqual(request.call_count, 2)
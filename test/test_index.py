@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import random
+import unittest
+
+from pycaching import Cache, Geocaching, Point, Rectangle
+from pycaching.errors import ValueError as PycachingValueError
+from pycaching.geo import Polygon, distances
+from pycaching.index import CacheIndex
+
+
+class TestCacheIndex(unittest.TestCase):
+    def setUp(self):
+        self.gc = Geocaching()
+        rnd = random.Random(42)
+        self.caches = [Cache(self.gc, "GC{}".format(i), location=Point(rnd.uniform(49, 51), rnd.uniform(13, 16)))
+                       for i in range(1000)]
+        self.index = CacheIndex(self.caches, cell_size=0.1)
+        self.point = Point(50.05, 14.45)
+
+    def test_add_remove(self):
+        index = CacheIndex()
+        cache = Cache(self.gc, "GC1", location=Point(50, 14))
+
+        with self.subTest("add"):
+            index.add(cache)
+            self.assertEqual(len(index), 1)
+            self.assertIn(cache, index)
+
+        with self.subTest("replace"):
+            moved = Cache(self.gc, "GC1", location=Point(10, 10))
+            index.add(moved)
+            self.assertEqual(list(index), [moved])
+            self.assertEqual(index.nearest(Point(50, 14)), [(moved, distances(Point(50, 14), [moved.location])[0])])
+
+        with self.subTest("remove"):
+            index.remove("GC1")
+            index.remove(cache)
+            self.assertEqual(len(index), 0)
+            self.assertEqual(index._cells, {})
+
+        with self.subTest("unknown location"):
+            with self.assertRaises(PycachingValueError):
+                index.add(Cache(self.gc, "GC2"))
+            index.update([Cache(self.gc, "GC2"), cache])
+            self.assertEqual(list(index), [cache])
+
+        with self.subTest("invalid cell size"):
+            with self.assertRaises(PycachingValueError):
+                CacheIndex(cell_size=0)
+
+    def test_in_rect(self):
+        rect = Rectangle(Point(50.3, 14.1), Point(49.9, 14.8))
+        expected = {c.wp for c in self.caches if c.location in rect}
+        self.assertSetEqual({c.wp for c in self.index.in_rect(rect)}, expected)
+        self.assertTrue(expected)
+
+    def test_in_polygon(self):
+        polygon = Polygon(Point(50.5, 14.0), Point(49.5, 14.5), Point(50.5, 15.0))
+        expected = {c.wp for c in self.caches if c.location in polygon}
+        self.assertSetEqual({c.wp for c in self.index.in_polygon(polygon)}, expected)
+        self.assertTrue(expected)
+
+    def test_within(self):
+        all_distances = distances(self.point, [c.location for c in self.caches])
+        expected = sorted((d, c.wp) for c, d in zip(self.caches, all_distances) if d <= 20000)
+
+        found = self.index.within(self.point, 20000)
+        self.assertEqual([(d, c.wp) for c, d in found], expected)
+        self.assertTrue(expected)
+
+    def test_nearest(self):
+        all_distances = distances(self.point, [c.location for c in self.caches])
+        expected = sorted((d, c.wp) for c, d in zip(self.caches, all_distances))
+
+        for k in 1, 20, 1000, 2000:
+            with self.subTest(k=k):
+                found = self.index.nearest(self.point, k)
+                self.assertEqual([(d, c.wp) for c, d in found], expected[:k])
+
+        with self.subTest("far away point"):
+            far = Point(-30, -60)
+            self.assertEqual(self.index.nearest(far, 5), CacheIndex(self.caches, cell_size=10).nearest(far, 5))
+
+        with self.subTest("empty"):
+            self.assertEqual(CacheIndex().nearest(self.point, 5), [])
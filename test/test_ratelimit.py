@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest import mock
+
+from pycaching import Point, Rectangle
+from pycaching.errors import ValueError as PycachingValueError, TooManyRequestsError
+from pycaching.geocaching import Geocaching
+from pycaching.ratelimit import TokenBucket, RateLimiter
+from . import NetworkedTest
+
+
+class FakeClock(object):
+    """Replacement of :mod:`time` module, where sleeping only moves the clock forward."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("pycaching.ratelimit.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_init(self):
+        with self.assertRaises(PycachingValueError):
+            TokenBucket(0)
+        with self.assertRaises(PycachingValueError):
+            TokenBucket(1, 0)
+
+    def test_acquire(self):
+        bucket = TokenBucket(2, capacity=3)
+
+        with self.subTest("burst"):
+            for _ in range(3):
+                self.assertEqual(bucket.acquire(), 0)
+
+        with self.subTest("paced after burst"):
+            self.assertAlmostEqual(bucket.acquire(), 0.5)
+            self.assertAlmostEqual(bucket.acquire(), 0.5)
+
+        with self.subTest("refilled after some time"):
+            self.clock.sleep(10)
+            for _ in range(3):
+                self.assertEqual(bucket.acquire(), 0)
+
+    def test_update(self):
+        with self.subTest("rate limit reached"):
+            bucket = TokenBucket(2, capacity=3)
+            bucket.update(reset=20, limited=True)
+            self.assertEqual(bucket.rate, 1)
+            self.assertAlmostEqual(bucket.acquire(), 20)
+
+        with self.subTest("rate limit reached without reset info"):
+            bucket = TokenBucket(2, capacity=3)
+            bucket.update(limited=True)
+            self.assertAlmostEqual(bucket.acquire(), 1)
+
+        with self.subTest("remaining requests are spread over the window"):
+            bucket = TokenBucket(10, capacity=5)
+            bucket.update(remaining=2, reset=10)
+            self.assertEqual(bucket.acquire(), 0)
+            self.assertEqual(bucket.acquire(), 0)
+            self.assertAlmostEqual(bucket.acquire(), 5)
+
+        with self.subTest("configured rate is used after the window"):
+            self.clock.sleep(20)
+            bucket.acquire()
+            self.assertEqual(bucket._current_rate(self.clock.now), 10)
+
+        with self.subTest("rate halved once per window"):
+            bucket = TokenBucket(2, capacity=3)
+            for _ in range(4):  # concurrent requests refused at once
+                bucket.update(reset=20, limited=True)
+            self.assertEqual(bucket.rate, 1)
+
+            with self.subTest("rate recovers after the window"):
+                bucket.update(remaining=10, reset=5)
+                self.assertEqual(bucket.rate, 1)
+                self.clock.sleep(20)
+                for _ in range(10):
+                    bucket.update(remaining=10, reset=60)
+                self.assertEqual(bucket.rate, 2)
+
+        with self.subTest("minimal rate"):
+            bucket = TokenBucket(TokenBucket.min_rate)
+            bucket.update(limited=True)
+            self.assertEqual(bucket.rate, TokenBucket.min_rate)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("pycaching.ratelimit.time", FakeClock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_limits(self):
+        limiter = RateLimiter({"logbook": None, "api_search": (5, 1), "custom": (1, 1)})
+
+        with self.subTest("default limits"):
+            self.assertEqual(limiter["cache_details"].rate, 1)
+
+        with self.subTest("overridden limits"):
+            self.assertEqual(limiter["api_search"].rate, 5)
+            self.assertEqual(limiter["custom"].rate, 1)
+
+        with self.subTest("disabled limits"):
+            with self.assertRaises(KeyError):
+                limiter["logbook"]
+            for _ in range(10):
+                self.assertEqual(limiter.acquire("logbook"), 0)
+
+        with self.subTest("unknown endpoints are not limited"):
+            for _ in range(10):
+                self.assertEqual(limiter.acquire(None), 0)
+            limiter.update(None, {"x-rate-limit-reset": "10"}, limited=True)
+
+    def test_update(self):
+        limiter = RateLimiter({"api_search": (1, 1)})
+        limiter.update("api_search", {"x-rate-limit-reset": "20"}, limited=True)
+        self.assertAlmostEqual(limiter.acquire("api_search"), 20)
+
+        with self.subTest("malformed headers are ignored"):
+            limiter.update("api_search", {"x-rate-limit-reset": "soon", "x-rate-limit-remaining": None})
+
+
+class TestGeocaching(NetworkedTest):
+    def test_recover_from_rate_limit(self):
+        """Test that rate limiter pauses requests instead of TooManyRequestsError.wait_for."""
+        rect = Rectangle(Point(50.74, 13.38), Point(49.73, 14.40))
+        gc = Geocaching(session=self.session, rate_limiter=RateLimiter({"api_search": (100, 100)}))
+        gc._logged_in = True
+
+        with self.recorder.use_cassette('geocaching_api_rate_limit'):
+            with mock.patch.object(TooManyRequestsError, 'wait_for', autospec=True) as wait_for:
+                with mock.patch("pycaching.ratelimit.time.sleep") as sleep:
+                    for i, _cache in enumerate(gc.search_rect(rect, per_query=1)):
+                        if sleep.called:
+                            break
+                        if i > 20:
+                            self.fail("Rate limiter did not wait")
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertAlmostEqual(sleep.call_args[0][0], 20, places=1)
+        self.assertEqual(gc._rate_limiter["api_search"].rate, 50)
+        self.assertFalse(wait_for.called)
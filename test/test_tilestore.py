@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from pycaching.geo import Tile
+from pycaching.geocaching import Geocaching
+from pycaching.tilestore import TileStore, StoredTile
+
+GRID = {"grid": [" !"], "keys": ["", "(1, 1)"], "data": {"(1, 1)": [{"i": "GC12345", "n": "Name"}]}}
+
+
+def make_response(status_code, content=b""):
+    res = requests.Response()
+    res.status_code = status_code
+    res._content = content
+    return res
+
+
+class TestTileStore(unittest.TestCase):
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+        self.store = TileStore(self.filename, max_age=60, max_size=350)  # fits two tiles
+
+    def tearDown(self):
+        self.store.close()
+        os.remove(self.filename)
+
+    def test_put_get(self):
+        with self.subTest("not stored"):
+            self.assertIsNone(self.store.get(1, 2, 3))
+
+        with self.subTest("stored"):
+            self.store.put(1, 2, 3, GRID, status_code=200, size=100, elapsed=0.5, png_needed=True)
+            stored = self.store.get(1, 2, 3)
+            self.assertIsInstance(stored, StoredTile)
+            self.assertEqual(stored.grid, GRID)
+            self.assertEqual((stored.status_code, stored.size, stored.elapsed), (200, 100, 0.5))
+            self.assertTrue(stored.png_needed)
+            self.assertTrue(self.store.is_fresh(stored))
+            self.assertIsNone(self.store.get(1, 2, 4))
+
+        with self.subTest("empty tile"):
+            self.store.put(1, 2, 4, None, status_code=204, size=0)
+            stored = self.store.get(1, 2, 4)
+            self.assertIsNone(stored.grid)
+            self.assertFalse(stored.png_needed)
+
+        with self.subTest("persistent"):
+            self.store.close()
+            self.store = TileStore(self.filename)
+            self.assertEqual(self.store.get(1, 2, 3).grid, GRID)
+
+        with self.subTest("clear"):
+            self.store.clear()
+            self.assertIsNone(self.store.get(1, 2, 3))
+            self.assertEqual(self.store.size, 0)
+
+    def test_is_fresh(self):
+        self.store.put(1, 2, 3, GRID, status_code=200, size=100)
+        with mock.patch("pycaching.tilestore.time.time", return_value=2e9):
+            self.assertFalse(self.store.is_fresh(self.store.get(1, 2, 3)))
+            self.store.max_age = None
+            self.assertTrue(self.store.is_fresh(self.store.get(1, 2, 3)))
+
+    def test_eviction(self):
+        with mock.patch("pycaching.tilestore.time.time", side_effect=range(100)):
+            for x in range(2):
+                self.store.put(x, 0, 0, GRID, status_code=200, size=100)
+            self.store.get(0, 0, 0)  # tile 1 is now the least recently used
+            self.store.put(2, 0, 0, GRID, status_code=200, size=100)
+
+        self.assertLessEqual(self.store.size, 350)
+        self.assertIsNone(self.store.get(1, 0, 0))
+        self.assertIsNotNone(self.store.get(0, 0, 0))
+        self.assertIsNotNone(self.store.get(2, 0, 0))
+
+        with self.subTest("empty tiles"):
+            for x in range(10):
+                self.store.put(x, 1, 0, None, status_code=204, size=0)
+            self.assertLessEqual(self.store.size, 350)
+            self.assertEqual(self.store.size % TileStore.row_size, 0)
+            self.assertIsNone(self.store.get(0, 1, 0))
+            self.assertIsNotNone(self.store.get(9, 1, 0))
+
+
+class TestTile(unittest.TestCase):
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+        self.store = TileStore(self.filename)
+        self.gc = Geocaching(tile_store=self.store)
+
+    def tearDown(self):
+        self.store.close()
+        os.remove(self.filename)
+
+    def test_download_utfgrid(self):
+        grid = make_response(200, b'{"grid": [], "keys": [], "data": {}}')
+
+        with self.subTest("downloaded with .png and stored"):
+            with mock.patch.object(self.gc, "_request", side_effect=[make_response(204), None, grid]) as request:
+                self.assertEqual(Tile(self.gc, 1, 2, 3)._download_utfgrid(), grid.json())
+            self.assertEqual(request.call_count, 3)
+            stored = self.store.get(1, 2, 3)
+            self.assertEqual((stored.grid, stored.status_code), (grid.json(), 200))
+            self.assertTrue(stored.png_needed)
+
+        with self.subTest("fresh tile is not downloaded"):
+            with mock.patch.object(self.gc, "_request") as request:
+                self.assertEqual(Tile(self.gc, 1, 2, 3)._download_utfgrid(), grid.json())
+            self.assertFalse(request.called)
+
+        with self.subTest("stale tile is downloaded with .png right away"):
+            self.store.max_age = 0
+            with mock.patch.object(self.gc, "_request", side_effect=[None, grid]) as request:
+                self.assertEqual(Tile(self.gc, 1, 2, 3)._download_utfgrid(), grid.json())
+            self.assertEqual(request.call_args_list[0][0][0], Tile._urls["tile"])
+            self.assertEqual(request.call_count, 2)
+
+        with self.subTest("empty tile is stored"):
+            self.store.max_age = None
+            with mock.patch.object(self.gc, "_request", side_effect=[make_response(204), None, make_response(204)]):
+                self.assertIsNone(Tile(self.gc, 4, 5, 6)._download_utfgrid())
+            with mock.patch.object(self.gc, "_request") as request:
+                self.assertIsNone(Tile(self.gc, 4, 5, 6)._download_utfgrid())
+            self.assertFalse(request.called)
+            self.assertEqual(self.store.get(4, 5, 6).status_code, 204)
@@ -2,8 +2,15 @@
 
 import datetime
 import itertools
+import re
+import threading
+import time
 
-from pycaching.util import rot13, parse_date, format_date, get_possible_attributes
+from bs4 import BeautifulSoup
+
+from pycaching.errors import ValueError as PycachingValueError
+from pycaching.util import (rot13, parse_date, format_date, get_possible_attributes, parallel_map, read_ahead,
+                            endpoint_class, PageRegions, default_html_parser, parse_html, search_source)
 from . import NetworkedTest
 
 
@@ -51,6 +58,132 @@ class TestModule(NetworkedTest):
         for user_format, ref_result in cases.items():
             self.assertEqual(format_date(date, user_format), ref_result)
 
+    def test_endpoint_class(self):
+        cases = {
+            "https://www.geocaching.com/api/proxy/web/search?box=1,2,3,4": "api_search",
+            "https://www.geocaching.com/seek/cache_details.aspx?wp=GC4808G": "cache_details",
+            "https://www.geocaching.com/geocache/GC4808G_nekonecne-ticho": "cache_details",
+            "https://www.geocaching.com/seek/cdpf.aspx?guid=xxx": "print_page",
+            "https://www.geocaching.com/seek/geocache.logbook?tkn=xxx": "logbook",
+            "http://tiles01.geocaching.com/map.info?x=1&y=2&z=3": "tiles",
+            "https://www.geocaching.com/account/signin": None,
+        }
+        for url, expected in cases.items():
+            with self.subTest(url):
+                self.assertEqual(endpoint_class(url), expected)
+
+    def test_parallel_map(self):
+        with self.subTest("ordered"):
+            # later items finish sooner
+            res = parallel_map(lambda i: time.sleep((10 - i) / 1000) or i * 2, range(10), workers=4)
+            self.assertEqual(list(res), [i * 2 for i in range(10)])
+
+        with self.subTest("unordered"):
+            res = parallel_map(lambda i: i * 2, range(10), workers=4, ordered=False)
+            self.assertCountEqual(list(res), [i * 2 for i in range(10)])
+
+        with self.subTest("bounded number of running items"):
+            running, max_running, lock = 0, 0, threading.Lock()
+
+            def track(i):
+                nonlocal running, max_running
+                with lock:
+                    running += 1
+                    max_running = max(max_running, running)
+                time.sleep(0.005)
+                with lock:
+                    running -= 1
+
+            list(parallel_map(track, range(20), workers=3))
+            self.assertLessEqual(max_running, 3)
+
+        with self.subTest("lazy consumption of infinite iterable"):
+            res = parallel_map(lambda i: i, itertools.count(), workers=2)
+            self.assertEqual(list(itertools.islice(res, 5)), [0, 1, 2, 3, 4])
+            res.close()
+
+        with self.subTest("errors are propagated"):
+            with self.assertRaises(ZeroDivisionError):
+                list(parallel_map(lambda i: 1 / i, [1, 0, 2], workers=2))
+
+        with self.subTest("invalid number of workers"):
+            with self.assertRaises(PycachingValueError):
+                list(parallel_map(lambda i: i, [1], workers=0))
+
+    def test_read_ahead(self):
+        with self.subTest("all items in order"):
+            self.assertEqual(list(read_ahead(range(10), 3)), list(range(10)))
+
+        with self.subTest("bounded number of items ahead"):
+            produced = []
+
+            def produce():
+                for i in itertools.count():
+                    produced.append(i)
+                    yield i
+
+            res = read_ahead(produce(), 2)
+            self.assertEqual(next(res), 0)
+            time.sleep(0.05)
+            # one item consumed, two waiting in the queue and one blocked in put
+            self.assertLessEqual(len(produced), 4)
+
+            with self.subTest("stopped when closed"):
+                res.close()
+                time.sleep(0.05)
+                count = len(produced)
+                time.sleep(0.05)
+                self.assertEqual(len(produced), count)
+
+        with self.subTest("errors are propagated"):
+            res = read_ahead((1 / i for i in [1, 0, 2]), 2)
+            self.assertEqual(next(res), 1)
+            with self.assertRaises(ZeroDivisionError):
+                next(res)
+
+        with self.subTest("base exceptions are propagated"):
+            def interrupted():
+                yield 1
+                raise KeyboardInterrupt()
+
+            res = read_ahead(interrupted(), 2)
+            self.assertEqual(next(res), 1)
+            with self.assertRaises(KeyboardInterrupt):
+                next(res)
+
+        with self.subTest("invalid depth"):
+            with self.assertRaises(PycachingValueError):
+                list(read_ahead([1], 0))
+
+    def test_page_regions(self):
+        html = """<html><head><title>GC123 Name</title><script>var x = 1;</script></head><body>
+            <div id="header"><a href="/">Home</a></div>
+            <div id="details"><h2>Name</h2><p class="Meta">Placed by: <b>author</b></p></div>
+            <p class="Warning NoBottomSpacing">Premium Member Only</p>
+            <p class="Other">skipped</p>
+            </body></html>"""
+        regions = PageRegions(names=["title"], ids=["details"], classes=["Warning"])
+
+        for parser in {"html.parser", default_html_parser()}:
+            with self.subTest(parser):
+                soup = BeautifulSoup(html, parser, parse_only=regions)
+                self.assertEqual(soup.title.text, "GC123 Name")
+                self.assertEqual(soup.find(id="details").find("b").text, "author")
+                self.assertEqual(soup.find("p", "Warning").text, "Premium Member Only")
+                self.assertIsNone(soup.find("script"))
+                self.assertIsNone(soup.find(id="header"))
+                self.assertIsNone(soup.find("p", "Other"))
+
+    def test_parse_html(self):
+        html = "<div id='text'>first\r\nsecond\rthird\n</div>"
+        texts = {parse_html(html, parser).find(id="text").text for parser in ("html.parser", default_html_parser())}
+        self.assertEqual(texts, {"first\nsecond\nthird\n"})
+
+    def test_search_source(self):
+        pattern = re.compile(r"<b>([^<]*)</b>")
+        self.assertEqual(search_source(pattern, "<p><b> Tom &amp; Jerry </b><b>x</b></p>"), "Tom & Jerry")
+        self.assertIsNone(search_source(pattern, "<p>nothing</p>"))
+
     def test_get_possible_attributes(self):
         with self.recorder.use_cassette('util_attributes'):
             attributes = get_possible_attributes(session=self.session)